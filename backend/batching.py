@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from inference import get_backend
+
+BATCHES = metrics.register(metrics.Counter(
+    "transcribe_batches_total", "Batched local inference runs by backend."))
+BATCH_SIZE = metrics.register(metrics.Histogram(
+    "transcribe_batch_size", "Requests per batched local inference run.",
+    buckets=(1, 2, 4, 8, 16, 32)))
+BATCH_FILL = metrics.register(metrics.Histogram(
+    "transcribe_batch_fill_ratio", "Batch size divided by the maximum batch size.",
+    buckets=(0.125, 0.25, 0.5, 0.75, 1)))
+
+
+class MicroBatcher:
+    """Groups concurrent requests for the same key into batches.
+
+    A batch runs when it reaches max_batch_size or when its first request has waited
+    max_wait seconds, whichever comes first. run_batch(key, items) is called in the
+    threadpool and must return one result per item, in order; an Exception in place of
+    a result fails only that item's request. When slots (an asyncio.Semaphore) is
+    given, a batch holds one slot while it runs.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait=0.05, slots=None):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.slots = slots
+        self._pending = {}
+        self._timers = {}
+        # The event loop only keeps weak references to tasks, so hold them until done
+        self._tasks = set()
+
+    async def submit(self, key, item):
+        """Queue item under key and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((item, future))
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(key)
+        elif len(pending) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._run(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key, batch):
+        items = [item for item, _ in batch]
+        try:
+            if self.slots is not None:
+                async with self.slots:
+                    results = await self._run_batch(key, items)
+            else:
+                results = await self._run_batch(key, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _run_batch(self, key, items):
+        label = "/".join(str(part) for part in key) if isinstance(key, tuple) else str(key)
+        BATCHES.inc(key=label)
+        BATCH_SIZE.observe(len(items), key=label)
+        BATCH_FILL.observe(len(items) / self.max_batch_size, key=label)
+        return await run_in_threadpool(self.run_batch, key, items)
+
+
+def run_local_batch(key, items):
+    """Run a batch of (audio_file, trace, submitted_at) items on the backend named by key.
+
+    The shared model load and inference time is recorded on every request's trace.
+    """
+    backend_name, model_size = key
+    backend = get_backend(backend_name, model_size)
+
+    start = time.perf_counter()
+    for _, trace, submitted_at in items:
+        trace.record('queue_wait', start - submitted_at)
+
+    backend.load()
+    loaded = time.perf_counter()
+    results = backend.transcribe_batch([audio_file for audio_file, _, _ in items], language="en")
+    finished = time.perf_counter()
+
+    for _, trace, _ in items:
+        trace.record('model_load', loaded - start)
+        trace.record('inference', finished - loaded)
+    return results
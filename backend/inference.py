@@ -0,0 +1,245 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+DEFAULT_BACKEND = 'stable-whisper'
+
+# Whisper decodes 30 second windows, shorter clips can share one batched decode
+BATCH_MAX_SECONDS = 30
+
+# Whisper's own transcribe() thresholds: a decode above the compression ratio or below
+# the log probability is retried, one likely to be silence is returned empty
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+class InferenceBackend(ABC):
+    """A local Whisper implementation that loads a model once and keeps it warm.
+
+    Subclasses implement _load_model and _transcribe; transcribe always returns a dict
+    with the full 'text' and a list of 'segments' holding 'text', 'start' and 'end'.
+    """
+
+    name = None
+    # Whether transcribe_batch decodes several clips in one pass rather than one by one
+    supports_batching = False
+
+    def __init__(self, model_size: str, cpu_threads: Optional[int] = None):
+        self.model_size = model_size
+        self.cpu_threads = cpu_threads
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the model on first use and return it."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    def transcribe(self, audio_file: str, language: Optional[str] = "en") -> dict:
+        """Transcribe audio_file, detecting the language when language is None"""
+        return self._transcribe(self.load(), audio_file, language)
+
+    def transcribe_batch(self, audio_files: list, language: Optional[str] = "en") -> list:
+        """Transcribe several audio files, returning one result per file in order.
+
+        A file that fails gets its exception in place of a result, so one bad file
+        does not fail the rest of the batch.
+        """
+        return [self._transcribe_or_error(audio_file, language) for audio_file in audio_files]
+
+    def _transcribe_or_error(self, audio_file, language):
+        try:
+            return self.transcribe(audio_file, language)
+        except Exception as e:
+            return e
+
+    @abstractmethod
+    def _load_model(self):
+        """Load and return the underlying model"""
+
+    @abstractmethod
+    def _transcribe(self, model, audio_file: str, language: str) -> dict:
+        """Transcribe audio_file with model, returning 'text' and 'segments'"""
+
+
+class StableWhisperBackend(InferenceBackend):
+    """The PyTorch Whisper model through stable-ts, fp32 on CPU"""
+
+    name = 'stable-whisper'
+    supports_batching = True
+
+    def _load_model(self):
+        import stable_whisper
+        import torch
+
+        if self.cpu_threads:
+            torch.set_num_threads(self.cpu_threads)
+        return stable_whisper.load_model(self.model_size)
+
+    def _transcribe(self, model, audio_file, language):
+        result = model.transcribe(audio_file, language=language)
+        segments = []
+        for segment in result.segments:
+            segments.append({
+                'text': segment.text,
+                'start': segment.start,
+                'end': segment.end
+            })
+        return {
+            'text': result.text,
+            'segments': segments
+        }
+
+    def transcribe_batch(self, audio_files, language="en"):
+        """Decode clips of up to BATCH_MAX_SECONDS as one batch of mel spectrograms.
+
+        The batched decode is a single greedy pass, so each clip gets Whisper's own
+        checks: likely silence comes back empty, and a decode that is too repetitive or
+        too unlikely is redone with the full stable-ts transcription and its temperature
+        fallback. A batch of one, longer clips and all clips of a batch whose decode
+        fails also take that path. A file that fails gets its exception in place of a
+        result.
+        """
+        if len(audio_files) < 2:
+            return super().transcribe_batch(audio_files, language)
+
+        import torch
+        import whisper
+        from whisper.tokenizer import get_tokenizer
+
+        model = self.load()
+        results = [None] * len(audio_files)
+        audios = {}
+        for i, audio_file in enumerate(audio_files):
+            try:
+                audios[i] = whisper.load_audio(audio_file)
+            except Exception as e:
+                results[i] = e
+        durations = {i: len(audio) / whisper.audio.SAMPLE_RATE for i, audio in audios.items()}
+        short = [i for i, duration in durations.items() if duration <= BATCH_MAX_SECONDS]
+
+        if short:
+            try:
+                mel = torch.stack([
+                    whisper.log_mel_spectrogram(whisper.pad_or_trim(audios[i]), n_mels=model.dims.n_mels)
+                    for i in short
+                ]).to(model.device)
+                options = whisper.DecodingOptions(language=language, without_timestamps=False,
+                                                  fp16=model.device.type != 'cpu')
+                with torch.no_grad():
+                    decoded = whisper.decode(model, mel, options)
+                tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                          language=language, task="transcribe")
+                for i, result in zip(short, decoded):
+                    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                        results[i] = {'text': '', 'segments': []}
+                    elif (result.compression_ratio <= COMPRESSION_RATIO_THRESHOLD
+                          and result.avg_logprob >= LOGPROB_THRESHOLD):
+                        results[i] = self._from_tokens(tokenizer, result.tokens, durations[i])
+            except Exception:
+                # Leave the short clips unset so they are retried one by one below
+                pass
+
+        for i, audio_file in enumerate(audio_files):
+            if results[i] is None:
+                results[i] = self._transcribe_or_error(audio_file, language)
+        return results
+
+    @staticmethod
+    def _from_tokens(tokenizer, tokens, duration):
+        """Split decoded tokens into segments at Whisper's timestamp tokens"""
+        segments = []
+        text_tokens = []
+        start = None
+        for token in tokens:
+            if token >= tokenizer.timestamp_begin:
+                seconds = (token - tokenizer.timestamp_begin) * 0.02
+                if text_tokens:
+                    segments.append({
+                        'text': tokenizer.decode(text_tokens),
+                        'start': start if start is not None else seconds,
+                        'end': seconds
+                    })
+                    text_tokens = []
+                    start = None
+                else:
+                    start = seconds
+            elif token < tokenizer.eot:
+                text_tokens.append(token)
+        if text_tokens:
+            segments.append({
+                'text': tokenizer.decode(text_tokens),
+                'start': start or 0.0,
+                'end': duration
+            })
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'segments': segments
+        }
+
+
+class CTranslate2Backend(InferenceBackend):
+    """The CTranslate2 Whisper model through faster-whisper, int8 quantized on CPU by default"""
+
+    name = 'ctranslate2'
+
+    def __init__(self, model_size: str, cpu_threads: Optional[int] = None, compute_type: Optional[str] = None):
+        super().__init__(model_size, cpu_threads)
+        self.compute_type = compute_type or os.getenv('WHISPER_COMPUTE_TYPE', 'int8')
+
+    def _load_model(self):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("The ctranslate2 backend requires faster-whisper: pip install faster-whisper")
+
+        return WhisperModel(self.model_size, device='cpu', compute_type=self.compute_type,
+                            cpu_threads=self.cpu_threads or 0)
+
+    def _transcribe(self, model, audio_file, language):
+        # faster-whisper yields segments lazily, decoding happens while iterating
+        result, _info = model.transcribe(audio_file, language=language, beam_size=5)
+        segments = []
+        for segment in result:
+            segments.append({
+                'text': segment.text,
+                'start': segment.start,
+                'end': segment.end
+            })
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'segments': segments
+        }
+
+
+BACKENDS = {
+    StableWhisperBackend.name: StableWhisperBackend,
+    CTranslate2Backend.name: CTranslate2Backend,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_backend(name: Optional[str] = None, model_size: Optional[str] = None) -> InferenceBackend:
+    """Return the shared backend instance for name and model_size.
+
+    Defaults come from WHISPER_BACKEND, WHISPER_MODEL_SIZE and WHISPER_CPU_THREADS.
+    Raises ValueError for unknown backend names.
+    """
+    name = name or os.getenv('WHISPER_BACKEND', DEFAULT_BACKEND)
+    model_size = model_size or os.getenv('WHISPER_MODEL_SIZE', 'large-v3')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}', choose from: {', '.join(BACKENDS)}")
+
+    with _instances_lock:
+        key = (name, model_size)
+        if key not in _instances:
+            cpu_threads = int(os.getenv('WHISPER_CPU_THREADS', '0')) or None
+            _instances[key] = BACKENDS[name](model_size, cpu_threads=cpu_threads)
+        return _instances[key]
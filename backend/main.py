@@ -1,41 +1,70 @@
+import asyncio
+import logging
 import tempfile
-from fastapi import FastAPI, UploadFile, HTTPException, Form, File
+import time
+from fastapi import FastAPI, UploadFile, HTTPException, Form, File, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 import openai
 import os
 from dotenv import load_dotenv
 from openai import OpenAI
 import pathlib
 import re
+import shutil
 
-from utils import convert_to_mp3
+import metrics
+from batching import MicroBatcher, run_local_batch
+from inference import BACKENDS, BATCH_MAX_SECONDS, get_backend
+from uploads import UploadStore, default_upload_dir
+from utils import convert_to_mp3, get_audio_duration
 from typing import Optional
-import stable_whisper
 
-def local_transcribe(audio_file: str) -> dict:
-    """Transcribe audio file using local Whisper model with timestamps"""
-    model_size = os.getenv('WHISPER_MODEL_SIZE', 'large-v3')
-    model = stable_whisper.load_model(model_size)
-    result = model.transcribe(audio_file, language="en")
-    
-    segments = []
-    for segment in result.segments:
-        segments.append({
-            'text': segment.text,
-            'start': segment.start,
-            'end': segment.end
-        })
-    
-    return {
-        'text': result.text,
-        'segments': segments
-    }
+logger = logging.getLogger("transcribe")
+
+
+def local_transcribe(audio_file: str, trace: Optional[metrics.RequestTrace] = None,
+                     backend: Optional[str] = None) -> dict:
+    """Transcribe audio file using a local Whisper backend with timestamps"""
+    trace = trace or metrics.RequestTrace('local-whisper')
+    inference_backend = get_backend(backend)
+    with trace.span('model_load'):
+        inference_backend.load()
+    with trace.span('inference'):
+        return inference_backend.transcribe(audio_file, language="en")
 
 
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'INFO'),
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
 openai.api_key = os.getenv('OPENAI_API_KEY')
 
+# Local inference is CPU bound, so requests beyond this limit wait in a queue
+local_inference_slots = asyncio.Semaphore(int(os.getenv('LOCAL_WHISPER_CONCURRENCY', '1')))
+
+# Short clips for the same backend and model arriving close together share one decode.
+# Opt-in with LOCAL_WHISPER_MAX_BATCH > 1: a batched clip is decoded in a single greedy
+# pass and only falls back to the full transcription when that pass looks unreliable
+local_batcher = MicroBatcher(
+    run_local_batch,
+    max_batch_size=int(os.getenv('LOCAL_WHISPER_MAX_BATCH', '1')),
+    max_wait=int(os.getenv('LOCAL_WHISPER_MAX_WAIT_MS', '50')) / 1000,
+    slots=local_inference_slots,
+)
+
+# Uploads above UPLOAD_MAX_BYTES are refused, sessions idle for UPLOAD_TTL_SECONDS are removed
+upload_store = UploadStore(
+    default_upload_dir(),
+    max_size=int(os.getenv('UPLOAD_MAX_BYTES', str(2 * 1024 ** 3))),
+    ttl=int(os.getenv('UPLOAD_TTL_SECONDS', str(24 * 3600))),
+)
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+
 app = FastAPI()
 
 # Configure CORS
@@ -47,87 +76,198 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.get("/metrics")
+async def get_metrics():
+    """Expose request, stage and resource metrics in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def recording_path(filename: str) -> pathlib.Path:
+    """Return the Documents/temp transcribe/ path a recording named filename is saved to"""
+    # Create the temp transcribe directory in Documents
+    documents_path = pathlib.Path.home() / "Documents"
+    temp_dir = documents_path / "temp transcribe"
+    temp_dir.mkdir(exist_ok=True)
+    
+    # Sanitize filename - replace problematic characters
+    sanitized_filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    
+    # Ensure filename has .mp3 extension
+    if not sanitized_filename.endswith('.mp3'):
+        sanitized_filename = f"{sanitized_filename}.mp3"
+    
+    return temp_dir / sanitized_filename
+
 @app.post("/api/save-recording")
 async def save_recording(audio: UploadFile = File(...), filename: str = Form(...)):
     """Save a recorded audio file to Documents/temp transcribe/"""
     try:
-        # Create the temp transcribe directory in Documents
-        documents_path = pathlib.Path.home() / "Documents"
-        temp_dir = documents_path / "temp transcribe"
-        temp_dir.mkdir(exist_ok=True)
-        
-        # Sanitize filename - replace problematic characters
-        sanitized_filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-        
-        # Ensure filename has .mp3 extension
-        if not sanitized_filename.endswith('.mp3'):
-            sanitized_filename = f"{sanitized_filename}.mp3"
-        
-        file_path = temp_dir / sanitized_filename
+        file_path = recording_path(filename)
         
         # Save the audio file
         content = await audio.read()
         with open(file_path, 'wb') as f:
             f.write(content)
         
-        print(f"Saved recording to: {file_path}")
+        logger.info(f"Saved recording to: {file_path}")
         
         return {
             "message": "Recording saved successfully",
             "file_path": str(file_path),
-            "filename": sanitized_filename
+            "filename": file_path.name
         }
     except Exception as e:
-        print(f"Error saving recording: {e}")
+        logger.error(f"Error saving recording: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def check_backend(backend: Optional[str]) -> None:
+    if backend is not None and backend not in BACKENDS:
+        raise HTTPException(status_code=400, detail=f"Unknown backend '{backend}', choose from: {', '.join(BACKENDS)}")
+
+async def run_transcription(audio_path: str, trace: metrics.RequestTrace, model: str,
+                            prompt: Optional[str] = None, backend: Optional[str] = None) -> dict:
+    """Convert audio_path and transcribe it with the requested model"""
+    # Convert to mp3 to reduce file size
+    with trace.span('convert'):
+        trace.audio_duration = await run_in_threadpool(get_audio_duration, audio_path)
+        if not audio_path.endswith('.mp3'):
+            file_to_transcribe = await run_in_threadpool(convert_to_mp3, audio_path)
+        else:
+            file_to_transcribe = audio_path
+
+    if model == 'local-whisper':
+        inference_backend = get_backend(backend)
+        if (inference_backend.supports_batching and local_batcher.max_batch_size > 1
+                and trace.audio_duration and trace.audio_duration <= BATCH_MAX_SECONDS):
+            key = (inference_backend.name, inference_backend.model_size)
+            result = await local_batcher.submit(key, (file_to_transcribe, trace, time.perf_counter()))
+        else:
+            with trace.span('queue_wait'):
+                await local_inference_slots.acquire()
+            try:
+                result = await run_in_threadpool(local_transcribe, file_to_transcribe, trace, backend)
+            finally:
+                local_inference_slots.release()
+        return {
+            "text": result["text"],
+            "segments": result["segments"]
+        }
+
+    def remote_transcribe():
+        client = OpenAI()
+        with open(file_to_transcribe, 'rb') as audio_file:
+            if prompt:
+                return client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                    prompt=prompt
+                )
+            return client.audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_file
+            )
+
+    with trace.span('remote_api'):
+        transcript = await run_in_threadpool(remote_transcribe)
+    return {"text": transcript.text}
+
 @app.post("/api/transcribe")
 async def transcribe_audio(
     audio: UploadFile = File(...),
     model: str = Form("whisper"),
-    prompt: Optional[str] = Form(None)
+    prompt: Optional[str] = Form(None),
+    backend: Optional[str] = Form(None)
 ):
-    print(f"Transcribing audio: {audio.filename}")
+    check_backend(backend)
+    trace = metrics.RequestTrace(model, audio.filename)
     try:
         # Create a temporary file for the uploaded audio
         with tempfile.NamedTemporaryFile(suffix=os.path.splitext(audio.filename)[1]) as temp_file:
-            content = await audio.read()
-            temp_file.write(content)
-            temp_file.flush()
+            with trace.span('upload'):
+                content = await audio.read()
+                temp_file.write(content)
+                temp_file.flush()
 
-            print(f"Using model: {model}")
-            if prompt:
-                print("Received prompt for transcription")
-
-            # Convert to mp3 to reduce file size
-            if not temp_file.name.endswith('.mp3'):
-                file_to_transcribe = convert_to_mp3(temp_file.name)
-            else:
-                file_to_transcribe = temp_file.name
-
-            if model == 'local-whisper':
-                result = local_transcribe(file_to_transcribe)
-                response = {
-                    "text": result["text"],
-                    "segments": result["segments"]
-                }
-            else:
-                client = OpenAI()
-                with open(file_to_transcribe, 'rb') as audio_file:
-                    if prompt:
-                        transcript = client.audio.transcriptions.create(
-                            model="whisper-1",
-                            file=audio_file,
-                            prompt=prompt
-                        )
-                    else:
-                        transcript = client.audio.transcriptions.create(
-                            model="whisper-1",
-                            file=audio_file
-                        )
-                response = {"text": transcript.text}
-            print(f"Response is: {response}")
+            response = await run_transcription(temp_file.name, trace, model, prompt, backend)
+            trace.finish("ok", prompt=bool(prompt), text_chars=len(response["text"]))
             return response
     except Exception as e:
-        print(f"Error transcribing audio: {e}")
+        trace.finish("error", error=str(e))
+        logger.error(f"Error transcribing audio: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+async def finish_upload(upload_id: str, session: dict, action: str, model: str,
+                        prompt: Optional[str], backend: Optional[str], filename: Optional[str]) -> dict:
+    """Save or transcribe an upload claimed by upload_store.finalize"""
+    if action == "save":
+        # A rename when the upload and recordings directories share a filesystem, else a copy
+        file_path = recording_path(filename or session['filename'])
+        await run_in_threadpool(shutil.move, session['data_path'], file_path)
+        upload_store.delete(upload_id, force=True)
+        logger.info(f"Saved recording to: {file_path}")
+        return {
+            "message": "Recording saved successfully",
+            "file_path": str(file_path),
+            "filename": file_path.name
+        }
+
+    trace = metrics.RequestTrace(model, session['filename'])
+    try:
+        response = await run_transcription(session['data_path'], trace, model, prompt, backend)
+        trace.finish("ok", prompt=bool(prompt), text_chars=len(response["text"]), upload_id=upload_id)
+    except Exception as e:
+        # Keep the upload so completing it can be retried without sending it again
+        trace.finish("error", error=str(e), upload_id=upload_id)
+        logger.error(f"Error transcribing upload {upload_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        converted = os.path.splitext(session['data_path'])[0] + '.mp3'
+        if converted != session['data_path'] and os.path.exists(converted):
+            os.remove(converted)
+    upload_store.delete(upload_id, force=True)
+    return response
+
+@app.post("/api/uploads")
+async def create_upload(filename: str = Form(...), size: int = Form(...), sha256: Optional[str] = Form(None)):
+    """Start a resumable upload of size bytes, optionally verified against a SHA-256 on completion"""
+    session = upload_store.create(filename, size, sha256)
+    return {**upload_store.status(session), "chunk_size": UPLOAD_CHUNK_SIZE}
+
+@app.get("/api/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """Report the byte ranges received so far, so an interrupted upload can resume"""
+    return upload_store.status(upload_store.get(upload_id))
+
+@app.put("/api/uploads/{upload_id}")
+async def put_upload_chunk(
+    upload_id: str,
+    request: Request,
+    content_range: Optional[str] = Header(None),
+    x_chunk_sha256: Optional[str] = Header(None)
+):
+    """Write one chunk, with its byte range in Content-Range and optional SHA-256 in X-Chunk-SHA256"""
+    return await upload_store.write_chunk(upload_id, content_range, request.stream(), x_chunk_sha256)
+
+@app.delete("/api/uploads/{upload_id}")
+async def delete_upload(upload_id: str):
+    upload_store.delete(upload_id)
+    return {"message": "Upload deleted"}
+
+@app.post("/api/uploads/{upload_id}/complete")
+async def complete_upload(
+    upload_id: str,
+    action: str = Form("transcribe"),
+    model: str = Form("whisper"),
+    prompt: Optional[str] = Form(None),
+    backend: Optional[str] = Form(None),
+    filename: Optional[str] = Form(None)
+):
+    """Finish an upload and either transcribe it (action=transcribe) or save it as a recording (action=save)"""
+    if action not in ("transcribe", "save"):
+        raise HTTPException(status_code=400, detail="action must be 'transcribe' or 'save'")
+    check_backend(backend)
+    # Claims the upload, so a retried or concurrent completion gets 409 until this one ends
+    session = await upload_store.finalize(upload_id)
+    try:
+        return await finish_upload(upload_id, session, action, model, prompt, backend, filename)
+    finally:
+        upload_store.release(upload_id)
@@ -0,0 +1,178 @@
+import json
+import logging
+import resource
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger("transcribe.metrics")
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+RTF_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 5, 10)
+
+
+# Model names used as label values; anything else is a remote API call
+MODEL_LABELS = ("local-whisper", "whisper")
+
+
+def model_label(model):
+    """Map a client supplied model name to a bounded set of label values."""
+    return model if model in MODEL_LABELS else "remote"
+
+
+def _escape_label(value):
+    # Prometheus text format escapes backslash, double quote and newline in label values
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels) + "}"
+
+
+class Counter:
+    """Monotonic counter with labels, rendered in Prometheus text format."""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative bucket histogram with labels, rendered in Prometheus text format."""
+
+    def __init__(self, name, help_text, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series['counts']):
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+REQUESTS = Counter("transcribe_requests_total", "Transcription requests by model and status.")
+STAGE_SECONDS = Histogram("transcribe_stage_seconds", "Time spent in each request stage.")
+REQUEST_SECONDS = Histogram("transcribe_request_seconds", "End-to-end request time.")
+AUDIO_SECONDS = Histogram("transcribe_audio_seconds", "Duration of the transcribed audio.",
+                          buckets=(5, 15, 30, 60, 300, 900, 1800, 3600, 7200))
+REAL_TIME_FACTOR = Histogram("transcribe_real_time_factor",
+                             "Processing time divided by audio duration, excluding upload and queue wait.",
+                             buckets=RTF_BUCKETS)
+
+_METRICS = [REQUESTS, STAGE_SECONDS, REQUEST_SECONDS, AUDIO_SECONDS, REAL_TIME_FACTOR]
+
+# Stages that are not spent processing the audio itself
+_WAIT_STAGES = ("upload", "queue_wait")
+
+
+def register(metric):
+    """Add a metric to the /metrics output and return it."""
+    _METRICS.append(metric)
+    return metric
+
+
+def peak_rss_bytes():
+    """Peak resident memory of this process in bytes."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def render():
+    """Render all metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    lines.append("# HELP process_peak_rss_bytes Peak resident memory of the server process.")
+    lines.append("# TYPE process_peak_rss_bytes gauge")
+    lines.append(f"process_peak_rss_bytes {peak_rss_bytes()}")
+    return "\n".join(lines) + "\n"
+
+
+class RequestTrace:
+    """Per-request timing spans, recorded as metrics and logged as one JSON line on finish."""
+
+    def __init__(self, model, filename=None):
+        self.request_id = uuid.uuid4().hex[:12]
+        self.model = model
+        self.label = model_label(model)
+        self.filename = filename
+        self.audio_duration = None
+        self.spans = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage, elapsed):
+        """Add a span measured elsewhere, e.g. a batch shared by several requests."""
+        self.spans[stage] = self.spans.get(stage, 0.0) + elapsed
+        STAGE_SECONDS.observe(elapsed, stage=stage, model=self.label)
+
+    def finish(self, status="ok", **extra):
+        total = time.perf_counter() - self._start
+        REQUEST_SECONDS.observe(total, model=self.label)
+        REQUESTS.inc(model=self.label, status=status)
+
+        record = {
+            "event": "transcribe",
+            "request_id": self.request_id,
+            "model": self.model,
+            "filename": self.filename,
+            "status": status,
+            "total_s": round(total, 4),
+            "spans_s": {stage: round(seconds, 4) for stage, seconds in self.spans.items()},
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+        if self.audio_duration:
+            processing = total - sum(self.spans.get(stage, 0.0) for stage in _WAIT_STAGES)
+            rtf = processing / self.audio_duration
+            AUDIO_SECONDS.observe(self.audio_duration, model=self.label)
+            REAL_TIME_FACTOR.observe(rtf, model=self.label)
+            record["audio_s"] = round(self.audio_duration, 3)
+            record["rtf"] = round(rtf, 4)
+        record.update(extra)
+        logger.info(json.dumps(record))
+        return record
@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+CONTENT_RANGE = re.compile(r'bytes (\d+)-(\d+)/(\d+)$')
+
+# Request body pieces are gathered up to this size before each write to disk
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def merge_ranges(ranges):
+    """Merge overlapping or adjacent [start, end) ranges"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def parse_content_range(header: Optional[str], size: int):
+    """Parse a 'bytes start-end/total' header into a [start, end) range within size"""
+    match = CONTENT_RANGE.match(header or '')
+    if not match:
+        raise HTTPException(status_code=400, detail="Content-Range header must look like 'bytes start-end/total'")
+    start, last, total = map(int, match.groups())
+    if total != size or start > last or last >= size:
+        raise HTTPException(status_code=416, detail=f"Range {start}-{last}/{total} is outside the {size} byte upload")
+    return start, last + 1
+
+
+def overlaps(ranges, start, end):
+    """Return True if [start, end) overlaps any of the [start, end) ranges"""
+    return any(start < range_end and range_start < end for range_start, range_end in ranges)
+
+
+class UploadStore:
+    """Resumable uploads written chunk by chunk straight into their final file.
+
+    Each session has a data file preallocated to the full size, which chunks are written
+    into at their offsets, and a small JSON file recording which byte ranges arrived.
+    Once every range is present the data file is the assembled upload, so nothing is
+    copied or re-read to put it together.
+
+    Uploads larger than max_size are refused, and sessions untouched for ttl seconds
+    are removed when the store is opened and whenever a new upload is created.
+    """
+
+    def __init__(self, directory: str, max_size: Optional[int] = None, ttl: Optional[float] = None):
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+        self._locks = {}
+        # Byte ranges currently being written, per upload
+        self._writing = {}
+        # Uploads being completed, which take no more chunks and cannot be completed again
+        self._completing = set()
+        self.expire()
+
+    def _meta_path(self, upload_id):
+        return os.path.join(self.directory, f"{upload_id}.json")
+
+    def _lock(self, upload_id):
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    def _save(self, session):
+        tmp_path = self._meta_path(session['upload_id']) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(session, f)
+        os.replace(tmp_path, self._meta_path(session['upload_id']))
+
+    def get(self, upload_id: str) -> dict:
+        if not re.fullmatch(r'[0-9a-f]{32}', upload_id):
+            raise HTTPException(status_code=404, detail="Upload not found")
+        try:
+            with open(self._meta_path(upload_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload not found")
+
+    def status(self, session: dict) -> dict:
+        received = sum(end - start for start, end in session['received'])
+        return {
+            "upload_id": session['upload_id'],
+            "filename": session['filename'],
+            "size": session['size'],
+            "received": session['received'],
+            "received_bytes": received,
+            "complete": received == session['size'],
+        }
+
+    def expire(self) -> None:
+        """Remove sessions whose metadata has not been updated for ttl seconds"""
+        if not self.ttl:
+            return
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            upload_id, extension = os.path.splitext(name)
+            if extension != '.json' or upload_id in self._writing or upload_id in self._completing:
+                continue
+            try:
+                if os.path.getmtime(self._meta_path(upload_id)) < cutoff:
+                    self.delete(upload_id)
+            except (OSError, ValueError, HTTPException):
+                continue
+
+    def create(self, filename: str, size: int, sha256: Optional[str] = None) -> dict:
+        if size <= 0:
+            raise HTTPException(status_code=400, detail="Upload size must be positive")
+        if self.max_size and size > self.max_size:
+            raise HTTPException(status_code=413, detail=f"Upload size exceeds the {self.max_size} byte limit")
+        self.expire()
+        upload_id = uuid.uuid4().hex
+        extension = os.path.splitext(filename)[1].lower()
+        session = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "size": size,
+            "sha256": sha256.lower() if sha256 else None,
+            "data_path": os.path.join(self.directory, f"{upload_id}{extension}"),
+            "received": [],
+            "created": time.time(),
+        }
+        # Reserve the full size up front so chunks can be written at any offset
+        with open(session['data_path'], 'wb') as f:
+            f.truncate(size)
+        self._save(session)
+        return session
+
+    async def write_chunk(self, upload_id: str, content_range: Optional[str], stream,
+                          chunk_sha256: Optional[str] = None) -> dict:
+        """Write a request body stream into the byte range given by content_range.
+
+        The range is only marked as received when its length and optional SHA-256 match,
+        so a failed chunk can simply be sent again. Ranges overlapping bytes already
+        received or being written by another request are refused with 409, so a bad
+        chunk can never overwrite verified data.
+        """
+        session = self.get(upload_id)
+        start, end = parse_content_range(content_range, session['size'])
+
+        async with self._lock(upload_id):
+            session = self.get(upload_id)
+            self._check_not_completing(upload_id)
+            writing = self._writing.setdefault(upload_id, [])
+            if overlaps(session['received'], start, end) or overlaps(writing, start, end):
+                raise HTTPException(status_code=409, detail={
+                    "message": f"Range {start}-{end - 1} overlaps data already received or in progress",
+                    **self.status(session),
+                })
+            writing.append((start, end))
+
+        try:
+            digest = hashlib.sha256()
+            written = 0
+            f = await run_in_threadpool(open, session['data_path'], 'r+b')
+            try:
+                await run_in_threadpool(f.seek, start)
+                buffer = bytearray()
+                async for piece in stream:
+                    if written + len(piece) > end - start:
+                        raise HTTPException(status_code=400, detail="Chunk is longer than its Content-Range")
+                    buffer += piece
+                    digest.update(piece)
+                    written += len(piece)
+                    if len(buffer) >= WRITE_BUFFER_SIZE:
+                        await run_in_threadpool(f.write, bytes(buffer))
+                        buffer.clear()
+                if buffer:
+                    await run_in_threadpool(f.write, bytes(buffer))
+            finally:
+                await run_in_threadpool(f.close)
+
+            if written != end - start:
+                raise HTTPException(status_code=400, detail=f"Expected {end - start} bytes, received {written}")
+            if chunk_sha256 and digest.hexdigest() != chunk_sha256.lower():
+                raise HTTPException(status_code=422, detail="Chunk checksum mismatch")
+
+            async with self._lock(upload_id):
+                session = self.get(upload_id)
+                session['received'] = merge_ranges(session['received'] + [[start, end]])
+                self._save(session)
+        finally:
+            writing.remove((start, end))
+            if not writing:
+                self._writing.pop(upload_id, None)
+        return self.status(session)
+
+    def _check_not_completing(self, upload_id):
+        if upload_id in self._completing:
+            raise HTTPException(status_code=409, detail="Upload is already being completed")
+
+    async def finalize(self, upload_id: str) -> dict:
+        """Check that the upload is complete, claim it for completion and return its session.
+
+        Until release() or delete() is called, further chunks and completions of the
+        upload are refused with 409, so a retried completion cannot race the first one.
+        """
+        async with self._lock(upload_id):
+            session = self.get(upload_id)
+            self._check_not_completing(upload_id)
+            status = self.status(session)
+            if not status['complete'] or upload_id in self._writing:
+                raise HTTPException(status_code=409, detail={"message": "Upload is incomplete", **status})
+            self._completing.add(upload_id)
+
+        try:
+            if session['sha256']:
+                # Only verified when the client asked for it, as it reads the file back once
+                if await run_in_threadpool(file_sha256, session['data_path']) != session['sha256']:
+                    raise HTTPException(status_code=422, detail="Upload checksum mismatch")
+        except BaseException:
+            self.release(upload_id)
+            raise
+        return session
+
+    def release(self, upload_id: str) -> None:
+        """Allow an upload claimed by finalize() to be completed again, e.g. after an error"""
+        self._completing.discard(upload_id)
+
+    def delete(self, upload_id: str, force: bool = False) -> None:
+        """Remove an upload; one being completed is only removed by its completion (force)"""
+        session = self.get(upload_id)
+        if not force:
+            self._check_not_completing(upload_id)
+        for path in (session['data_path'], self._meta_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+        self._locks.pop(upload_id, None)
+        self._completing.discard(upload_id)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def default_upload_dir() -> str:
+    return os.getenv('UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'transcribe_uploads'))
@@ -1,5 +1,6 @@
 import os
 from pydub import AudioSegment
+from pydub.utils import mediainfo
 
 
 def load_audio(input_path):
@@ -39,3 +40,9 @@ def convert_to_mp3(input_path, output_path=None, bitrate="128k"):
         ]
     )
     return output_path
+
+
+def get_audio_duration(input_path):
+    # Read the duration from the container with ffprobe instead of decoding the audio
+    duration = mediainfo(input_path).get('duration')
+    return float(duration) if duration else None
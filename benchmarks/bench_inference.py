@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Inference Backend Benchmark
+
+Usage:
+    python benchmarks/bench_inference.py recording.m4a
+    python benchmarks/bench_inference.py recording.m4a --model-size small --threads 4 --repeats 3
+
+Compares the local Whisper inference backends on the same audio file. Each backend runs
+in its own process and reports model load time, best inference time, real-time factor and
+peak RSS. Without an audio file a synthetic noise clip is used, which only measures speed.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from inference import BACKENDS  # noqa: E402
+from run_benchmarks import _peak_rss_bytes  # noqa: E402
+from synthetic import make_audio  # noqa: E402
+from utils import get_audio_duration  # noqa: E402
+
+
+def _run_backend(name, model_size, threads, audio_file, repeats):
+    if threads:
+        os.environ['WHISPER_CPU_THREADS'] = str(threads)
+    from inference import get_backend
+
+    backend = get_backend(name, model_size)
+    start = time.perf_counter()
+    backend.load()
+    load_s = time.perf_counter() - start
+
+    best, text = float('inf'), ''
+    for _ in range(repeats):
+        start = time.perf_counter()
+        text = backend.transcribe(audio_file)['text']
+        best = min(best, time.perf_counter() - start)
+    return load_s, best, _peak_rss_bytes(), text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare local Whisper inference backends.")
+    parser.add_argument("audio", nargs='?', help="Audio file to transcribe (default: 30s synthetic noise)")
+    parser.add_argument("--backends", nargs='+', choices=BACKENDS.keys(), default=list(BACKENDS), help="Backends to compare (default: all)")
+    parser.add_argument("-m", "--model-size", default=os.getenv('WHISPER_MODEL_SIZE', 'large-v3'), help="Whisper model size")
+    parser.add_argument("-t", "--threads", type=int, default=0, help="CPU threads per backend (default: library default)")
+    parser.add_argument("-r", "--repeats", type=int, default=1, help="Inference runs per backend, the fastest is reported (default: 1)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_inference_") as work:
+        audio_file = args.audio or make_audio(os.path.join(work, "noise.wav"), 30, kind='noise')
+        duration = get_audio_duration(audio_file)
+
+        ctx = multiprocessing.get_context("spawn")
+        print(f"{'backend':<16} {'load s':>8} {'infer s':>8} {'RTF':>7} {'peak MiB':>9}")
+        for name in args.backends:
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                try:
+                    load_s, infer_s, rss, text = executor.submit(
+                        _run_backend, name, args.model_size, args.threads, audio_file, args.repeats).result()
+                except Exception as e:
+                    print(f"{name:<16} error: {e}")
+                    continue
+            rtf = infer_s / duration if duration else float('nan')
+            print(f"{name:<16} {load_s:8.2f} {infer_s:8.2f} {rtf:7.3f} {rss / 2**20:9.1f}")
+            print(f"  {text[:100]!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+
+Usage:
+    python benchmarks/run_benchmarks.py -o bench.json
+    python benchmarks/run_benchmarks.py --scales small medium --cases merge_pdfs protect_pdf
+    python benchmarks/run_benchmarks.py -o new.json --compare old.json
+
+Generates synthetic inputs and times images_to_pdf, merge_pdfs, protect_pdf, compress,
+convert_to_mp3 and degrade_and_blur_region at several scales. Every run happens in a fresh
+process so the recorded peak RSS belongs to that run alone. Results (wall time, peak RSS
+and output size) are written to JSON and can be compared against an earlier run.
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+import synthetic  # noqa: E402
+
+SCALES = {
+    'small': {'images': 5, 'image_size': (800, 1000), 'pdfs': 2, 'pages': 5,
+              'video_seconds': 2, 'video_size': '640x360', 'audio_seconds': 30,
+              'doc_size': (1200, 1600), 'regions': 4},
+    'medium': {'images': 20, 'image_size': (1700, 2200), 'pdfs': 5, 'pages': 20,
+               'video_seconds': 5, 'video_size': '1280x720', 'audio_seconds': 300,
+               'doc_size': (2500, 3300), 'regions': 16},
+    'large': {'images': 50, 'image_size': (2500, 3300), 'pdfs': 10, 'pages': 50,
+              'video_seconds': 10, 'video_size': '1920x1080', 'audio_seconds': 1800,
+              'doc_size': (5000, 6600), 'regions': 64},
+}
+
+
+def _setup_images_to_pdf(work, scale):
+    src = synthetic.make_images(os.path.join(work, "images"), scale['images'], *scale['image_size'])
+    out = os.path.join(work, "images.pdf")
+    return "images_to_pdf", "images_to_pdf", (src, out), {}, out
+
+
+def _setup_merge_pdfs(work, scale):
+    pdfs = [synthetic.make_pdf(os.path.join(work, f"in_{i}.pdf"), scale['pages'])
+            for i in range(scale['pdfs'])]
+    out = os.path.join(work, "merged.pdf")
+    return "merge_pdfs", "merge_pdfs", (pdfs, out), {}, out
+
+
+def _setup_protect_pdf(work, scale):
+    src = synthetic.make_pdf(os.path.join(work, "plain.pdf"), scale['pages'] * scale['pdfs'])
+    out = os.path.join(work, "protected.pdf")
+    return "protect_pdfs", "protect_pdf", (src, out, "benchmark"), {}, out
+
+
+def _setup_compress(work, scale):
+    src = synthetic.make_video(os.path.join(work, "video.mp4"), scale['video_seconds'], scale['video_size'])
+    out = os.path.join(work, "video_compressed.mp4")
+    return "compress_mp4", "compress", (Path(src), Path(out)), {'crf': 28, 'preset': 'veryfast'}, out
+
+
+def _setup_convert_to_mp3(work, scale):
+    src = synthetic.make_audio(os.path.join(work, "audio.wav"), scale['audio_seconds'], kind='noise')
+    out = os.path.join(work, "audio.mp3")
+    return "utils", "convert_to_mp3", (src, out), {}, out
+
+
+def _setup_degrade_and_blur_region(work, scale):
+    width, height = scale['doc_size']
+    src = os.path.join(work, "doc")
+    synthetic.make_images(src, 1, width, height)
+    out = os.path.join(work, "doc_obfuscated.jpg")
+    cols = int(scale['regions'] ** 0.5)
+    cell_w, cell_h = width // cols, height // cols
+    regions = [(c * cell_w, r * cell_h, c * cell_w + cell_w // 2, r * cell_h + cell_h // 2)
+               for r in range(cols) for c in range(cols)]
+    return ("noise_docs", "degrade_and_blur_region", (os.path.join(src, "0.jpg"), out),
+            {'regions': regions, 'seed': 0}, out)
+
+
+CASES = {
+    'images_to_pdf': (_setup_images_to_pdf, False),
+    'merge_pdfs': (_setup_merge_pdfs, False),
+    'protect_pdf': (_setup_protect_pdf, False),
+    'compress': (_setup_compress, True),
+    'convert_to_mp3': (_setup_convert_to_mp3, True),
+    'degrade_and_blur_region': (_setup_degrade_and_blur_region, False),
+}
+
+
+def _peak_rss_bytes():
+    """Peak RSS of this process and its finished children (ffmpeg) in bytes."""
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def _run_in_child(module_name, func_name, args, kwargs):
+    """Import and call the benchmarked function, returning its wall time and peak RSS.
+
+    Several tools report failure by returning False rather than raising, which is
+    raised here so the run is recorded as an error.
+    """
+    func = getattr(importlib.import_module(module_name), func_name)
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+        finally:
+            sys.stdout = stdout
+    if result is False:
+        raise RuntimeError(f"{func_name} reported failure")
+    return elapsed, _peak_rss_bytes()
+
+
+def run_case(name, scale_name, repeats=1):
+    """Run one case at one scale and return its result record."""
+    setup, needs_ffmpeg = CASES[name]
+    record = {'case': name, 'scale': scale_name}
+    if needs_ffmpeg and shutil.which("ffmpeg") is None:
+        record['skipped'] = "ffmpeg not found"
+        return record
+
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as work:
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                module_name, func_name, args, kwargs, output = setup(work, SCALES[scale_name])
+            finally:
+                sys.stdout = stdout
+
+        walls, rss = [], []
+        for _ in range(repeats):
+            # A fresh process per run, spawned processes inherit sys.path from this one
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                try:
+                    elapsed, peak = executor.submit(_run_in_child, module_name, func_name, args, kwargs).result()
+                except (Exception, SystemExit) as e:
+                    record['error'] = f"{type(e).__name__}: {e}"
+                    return record
+            if not os.path.exists(output):
+                record['error'] = f"{func_name} did not write {os.path.basename(output)}"
+                return record
+            walls.append(elapsed)
+            rss.append(peak)
+
+        record.update({
+            'wall_s': min(walls),
+            'wall_s_all': walls,
+            'peak_rss_bytes': max(rss),
+            'output_bytes': os.path.getsize(output),
+        })
+    return record
+
+
+def _version():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline_path):
+    """Print the ratio of each metric against a previous results file (<1 is better)."""
+    with open(baseline_path) as f:
+        baseline = {(r['case'], r['scale']): r for r in json.load(f)['results']}
+
+    print(f"\nComparison against {baseline_path}:")
+    print(f"{'case':<26} {'scale':<8} {'wall':>8} {'rss':>8} {'size':>8}")
+    for record in results:
+        old = baseline.get((record['case'], record['scale']))
+        if old is None or 'wall_s' not in record or 'wall_s' not in old:
+            continue
+        ratios = []
+        for key in ('wall_s', 'peak_rss_bytes', 'output_bytes'):
+            ratios.append(f"{record[key] / old[key]:7.2f}x" if record.get(key) and old.get(key) else f"{'-':>8}")
+        print(f"{record['case']:<26} {record['scale']:<8} {' '.join(ratios)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the document and media tools on synthetic data.")
+    parser.add_argument("--cases", nargs='+', choices=CASES.keys(), default=list(CASES), help="Cases to run (default: all)")
+    parser.add_argument("--scales", nargs='+', choices=SCALES.keys(), default=['small'], help="Scales to run (default: small)")
+    parser.add_argument("-r", "--repeats", type=int, default=3, help="Runs per case, the fastest wall time is reported (default: 3)")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="Results JSON file (default: bench_results.json)")
+    parser.add_argument("-c", "--compare", help="Previous results JSON file to compare against")
+    args = parser.parse_args()
+
+    results = []
+    for scale_name in args.scales:
+        for name in args.cases:
+            record = run_case(name, scale_name, args.repeats)
+            results.append(record)
+            if 'wall_s' in record:
+                print(f"{name:<26} {scale_name:<8} {record['wall_s']:8.3f}s "
+                      f"{record['peak_rss_bytes'] / 2**20:8.1f} MiB {(record['output_bytes'] or 0) / 2**10:10.1f} KiB")
+            else:
+                print(f"{name:<26} {scale_name:<8} {record.get('skipped') or record.get('error')}")
+
+    with open(args.output, "w") as f:
+        json.dump({
+            'version': _version(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            'results': results,
+        }, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Synthetic input generators for the benchmark suite.
+
+Everything is generated locally: numbered page images, multi-page PDFs with mixed page
+sizes, ffmpeg testsrc videos and sine/noise WAV audio.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import wave
+
+import numpy as np
+from reportlab.lib.pagesizes import A3, A4, legal, letter
+from reportlab.pdfgen import canvas
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from images_to_pdf import create_test_images  # noqa: E402
+
+PAGE_SIZES = [letter, A4, legal, A3]
+
+
+def make_images(directory, count=5, width=800, height=1000, seed=0):
+    """Create count numbered page images in directory and return the directory."""
+    create_test_images(directory, count, width=width, height=height, rng=np.random.default_rng(seed))
+    return directory
+
+
+def make_pdf(path, pages=10, page_sizes=PAGE_SIZES):
+    """Create a PDF with pages cycling through page_sizes and return its path."""
+    c = canvas.Canvas(path)
+    for i in range(pages):
+        width, height = page_sizes[i % len(page_sizes)]
+        c.setPageSize((width, height))
+        c.setFont("Helvetica", 36)
+        c.drawCentredString(width / 2, height / 2, f"Page {i}")
+        c.rect(36, 36, width - 72, height - 72)
+        c.showPage()
+    c.save()
+    return path
+
+
+def make_video(path, seconds=5, size='1280x720', rate=30):
+    """Render an ffmpeg testsrc video with a sine audio track and return its path."""
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg not found")
+    cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc=duration={seconds}:size={size}:rate={rate}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "18",
+        "-c:a", "aac", "-shortest", path,
+    ]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+def make_audio(path, seconds=30, kind='sine', sample_rate=16000, seed=0):
+    """Write a mono 16-bit WAV of a 440 Hz sine or white noise and return its path."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    if kind == 'sine':
+        signal = 0.5 * np.sin(2 * np.pi * 440 * t)
+    elif kind == 'noise':
+        signal = np.random.default_rng(seed).uniform(-0.5, 0.5, t.size)
+    else:
+        raise ValueError(f"Unknown audio kind: {kind}")
+
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((signal * 32767).astype('<i2').tobytes())
+    return path
@@ -24,6 +24,8 @@ python compress_mp4.py input.mp4 -o out.mp4 # custom output name
 python compress_mp4.py input.mp4 -l 5       # aggressive compression (CRF 38)
 python compress_mp4.py input.mp4 --bitrate 1M  # ~1 Mbit/s target bit‑rate, two‑pass
 python compress_mp4.py input.mp4 -l 2 -p fast --max-width 1280
+python compress_mp4.py input.mp4 --auto     # cheapest CRF meeting a quality floor
+python compress_mp4.py input.mp4 --auto --metric ssim --min-quality 0.98
 ```
 
 Arguments
@@ -48,15 +50,31 @@ optional:
   --max-width           Maximum width (px) — keeps aspect ratio
   --max-height          Maximum height (px) — keeps aspect ratio
   --dry-run             Print ffmpeg command without executing it
+  --auto                Pick the level per file: encode short samples at every
+                        level's CRF in parallel, measure their quality and use the
+                        highest CRF whose worst sample meets --min-quality.
+                        Decisions are cached by file hash. Ignored with --bitrate.
+  --metric              auto|vmaf|ssim|psnr. auto uses VMAF when ffmpeg has
+                        libvmaf, SSIM otherwise and PSNR as a last resort.
+  --min-quality         Quality floor (default: VMAF 93, SSIM 0.97, PSNR 40 dB)
+  --samples             Number of samples taken across the video [default: 3]
+  --sample-seconds      Length of each sample in seconds [default: 4]
+  --no-cache            Re-analyse even if a cached decision exists
 ```
 
 Examples and more details are in the README section at the bottom.
 """
 
 import argparse
+import hashlib
+import json
+import os
+import re
 import shutil
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Define CRF values for each compression level
@@ -68,6 +86,22 @@ CRF_LEVELS = {
     5: 38,  # Aggressive compression, smallest size
 }
 
+# Default quality floors per metric used by --auto
+QUALITY_FLOORS = {
+    "vmaf": 93.0,  # VMAF score (0-100)
+    "ssim": 0.97,  # SSIM "All" (0-1)
+    "psnr": 40.0,  # average PSNR in dB
+}
+
+# Regexes reading each metric's summary from ffmpeg's stderr
+QUALITY_PATTERNS = {
+    "vmaf": re.compile(r"VMAF score[:=]\s*([\d.]+)"),
+    "ssim": re.compile(r"All:([\d.]+)"),
+    "psnr": re.compile(r"average:([\d.]+|inf)"),
+}
+
+CRF_CACHE = Path.home() / ".cache" / "compress_mp4" / "crf_cache.json"
+
 
 def ffmpeg_exists() -> bool:
     """Return True if ffmpeg binary is found in PATH."""
@@ -93,6 +127,158 @@ def build_scale_filter(max_w: int | None, max_h: int | None) -> str | None:
     return f"scale={':'.join(parts)}"
 
 
+def has_filter(name: str) -> bool:
+    """Return True if the local ffmpeg build provides the filter *name*."""
+    res = subprocess.run(["ffmpeg", "-hide_banner", "-filters"], capture_output=True, text=True)
+    return re.search(rf"^\s*\S*\s+{re.escape(name)}\s", res.stdout, re.MULTILINE) is not None
+
+
+def pick_metric(metric: str = "auto") -> str:
+    """Resolve *metric*, preferring VMAF, then SSIM, then PSNR for "auto"."""
+    if metric != "auto":
+        return metric
+    if has_filter("libvmaf"):
+        return "vmaf"
+    return "ssim" if has_filter("ssim") else "psnr"
+
+
+def probe_duration(src: Path) -> float:
+    """Return the duration of *src* in seconds using ffprobe."""
+    res = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+         "-of", "default=noprint_wrappers=1:nokey=1", str(src)],
+        capture_output=True, text=True,
+    )
+    try:
+        return float(res.stdout.strip())
+    except ValueError:
+        sys.exit(f"Could not read the duration of {src}: {res.stderr.strip()}")
+
+
+def sample_offsets(duration: float, samples: int, sample_seconds: float) -> list[tuple[float, float]]:
+    """Return (start, length) pairs spread evenly across a video of *duration* seconds."""
+    if duration <= samples * sample_seconds:
+        return [(0.0, duration)]
+    step = duration / samples
+    # Take each sample from the middle of its slice of the video
+    return [(i * step + (step - sample_seconds) / 2, sample_seconds) for i in range(samples)]
+
+
+def file_hash(path: Path) -> str:
+    """Return the SHA-256 of *path*, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def measure_sample(
+    src: Path,
+    start: float,
+    length: float,
+    crf: int,
+    metric: str,
+    workdir: str,
+    *,
+    preset: str = "medium",
+    scale_filter: str | None = None,
+) -> float:
+    """Encode one sample of *src* at *crf* and return its *metric* score against the source."""
+    sample = Path(workdir) / f"sample_{crf}_{start:.2f}.mp4"
+    encode = [
+        "ffmpeg", "-y", "-v", "error",
+        "-ss", f"{start:.3f}", "-t", f"{length:.3f}", "-i", str(src),
+        *(["-vf", scale_filter] if scale_filter else []),
+        "-c:v", "libx264", "-crf", str(crf), "-preset", preset, "-an", str(sample),
+    ]
+    res = subprocess.run(encode, capture_output=True, text=True)
+    if res.returncode != 0:
+        raise RuntimeError(f"Sample encode failed: {res.stderr.strip()}")
+
+    # The reference is the same source segment, scaled like the encode so frames line up
+    ref = f"[1:v]{scale_filter}[ref];" if scale_filter else "[1:v]null[ref];"
+    compare = f"{ref}[0:v][ref]{'libvmaf' if metric == 'vmaf' else metric}"
+    measure = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-i", str(sample),
+        "-ss", f"{start:.3f}", "-t", f"{length:.3f}", "-i", str(src),
+        "-lavfi", compare, "-f", "null", "-",
+    ]
+    res = subprocess.run(measure, capture_output=True, text=True)
+    matches = QUALITY_PATTERNS[metric].findall(res.stderr)
+    if res.returncode != 0 or not matches:
+        raise RuntimeError(f"Could not measure {metric}: {res.stderr.strip()[-500:]}")
+    return 100.0 if matches[-1] == "inf" else float(matches[-1])
+
+
+def choose_crf(
+    src: Path,
+    *,
+    min_quality: float | None = None,
+    metric: str = "auto",
+    samples: int = 3,
+    sample_seconds: float = 4.0,
+    preset: str = "medium",
+    max_width: int | None = None,
+    max_height: int | None = None,
+    workers: int | None = None,
+    use_cache: bool = True,
+) -> int:
+    """Return the highest (cheapest) CRF from CRF_LEVELS meeting *min_quality*.
+
+    Samples of *src* are encoded at every candidate CRF in parallel and scored with
+    *metric*; a CRF qualifies when its worst sample meets the floor. If none does, the
+    best-quality level is returned. Decisions are cached by the hash of *src* and the
+    analysis settings, so re-running on the same file is free.
+    """
+    if not ffmpeg_exists():
+        sys.exit(
+            "ffmpeg not found. Install it first: https://ffmpeg.org/download.html"
+        )
+
+    metric = pick_metric(metric)
+    floor = QUALITY_FLOORS[metric] if min_quality is None else min_quality
+    scale_filter = build_scale_filter(max_width, max_height)
+
+    cache: dict = {}
+    key = None
+    if use_cache:
+        key = ":".join(map(str, (file_hash(src), metric, floor, samples, sample_seconds, preset, scale_filter)))
+        if CRF_CACHE.exists():
+            cache = json.loads(CRF_CACHE.read_text())
+        if key in cache:
+            print(f"Using cached CRF {cache[key]['crf']} for {src}")
+            return cache[key]["crf"]
+
+    offsets = sample_offsets(probe_duration(src), samples, sample_seconds)
+    candidates = sorted(CRF_LEVELS.values())
+    jobs = [(crf, start, length) for crf in candidates for start, length in offsets]
+
+    with tempfile.TemporaryDirectory(prefix="compress_mp4_") as workdir:
+        with ThreadPoolExecutor(max_workers=workers or max(1, (os.cpu_count() or 2) // 2)) as executor:
+            scores = list(executor.map(
+                lambda job: measure_sample(src, job[1], job[2], job[0], metric, workdir,
+                                           preset=preset, scale_filter=scale_filter),
+                jobs,
+            ))
+
+    worst = {crf: min(score for (c, _, _), score in zip(jobs, scores) if c == crf) for crf in candidates}
+    for crf in candidates:
+        print(f"  CRF {crf}: {metric} {worst[crf]:.4f}")
+    passing = [crf for crf in candidates if worst[crf] >= floor]
+    crf = max(passing) if passing else min(candidates)
+    print(f"Selected CRF {crf} ({metric} floor {floor})")
+
+    if use_cache:
+        cache[key] = {"crf": crf, "scores": {str(c): s for c, s in worst.items()}, "file": str(src)}
+        CRF_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = CRF_CACHE.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(cache, indent=2))
+        os.replace(tmp_path, CRF_CACHE)
+    return crf
+
+
 def compress(
     src: Path,
     dst: Path,
@@ -241,6 +427,26 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:  # noqa: AN
     p.add_argument("--max-width", type=int, help="Maximum width in pixels")
     p.add_argument("--max-height", type=int, help="Maximum height in pixels")
     p.add_argument("--dry-run", action="store_true", help="Print ffmpeg command only")
+    p.add_argument(
+        "--auto",
+        action="store_true",
+        help="Pick the cheapest level meeting --min-quality from encoded samples. Overrides --level.",
+    )
+    p.add_argument(
+        "--metric",
+        default="auto",
+        choices=["auto", *QUALITY_FLOORS],
+        help="Quality metric for --auto: VMAF if available, else SSIM, else PSNR by default",
+    )
+    p.add_argument(
+        "--min-quality",
+        type=float,
+        help="Quality floor for --auto (default: "
+             + ", ".join(f"{m.upper()} {v}" for m, v in QUALITY_FLOORS.items()) + ")",
+    )
+    p.add_argument("--samples", type=int, default=3, help="Samples analysed by --auto (default: 3)")
+    p.add_argument("--sample-seconds", type=float, default=4.0, help="Seconds per --auto sample (default: 4)")
+    p.add_argument("--no-cache", action="store_true", help="Ignore cached --auto decisions")
     return p.parse_args(argv)
 
 
@@ -254,8 +460,29 @@ def main(argv: list[str] | None = None) -> None:
         else input_path.with_name(input_path.stem + "_compressed.mp4")
     )
 
-    # Determine CRF value based on the selected level
-    crf_value = CRF_LEVELS[args.level]
+    # Determine CRF value based on the selected level, or analyse the file for one
+    if args.auto and not args.bitrate and args.dry_run:
+        # The analysis encodes samples, hashes the input and writes the cache, so a dry
+        # run only describes it and prints the command at the selected level instead
+        candidates = ", ".join(map(str, sorted(CRF_LEVELS.values())))
+        print(f"--auto would encode {args.samples} x {args.sample_seconds:g}s samples at CRF "
+              f"{candidates} and keep the cheapest meeting the quality floor; "
+              f"showing the command for level {args.level}")
+        crf_value = CRF_LEVELS[args.level]
+    elif args.auto and not args.bitrate:
+        crf_value = choose_crf(
+            input_path,
+            min_quality=args.min_quality,
+            metric=args.metric,
+            samples=args.samples,
+            sample_seconds=args.sample_seconds,
+            preset=args.preset,
+            max_width=args.max_width,
+            max_height=args.max_height,
+            use_cache=not args.no_cache,
+        )
+    else:
+        crf_value = CRF_LEVELS[args.level]
 
     compress(
         src=input_path,
@@ -6,8 +6,11 @@ import glob
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 
+from tiled_image import TILED_PIXEL_THRESHOLD, downscale_to_fit, image_size
+
 def extract_page_number(filename):
     """Extract page number from filename (e.g., '1.jpg' -> 1)"""
     match = re.match(r'(\d+)\.[a-zA-Z]+$', os.path.basename(filename))
@@ -15,8 +18,13 @@ def extract_page_number(filename):
         return int(match.group(1))
     return None
 
-def images_to_pdf(input_dir='./input', output_file='output.pdf', page_size=letter):
-    """Convert images in input_dir to a single PDF file"""
+def images_to_pdf(input_dir='./input', output_file='output.pdf', page_size=letter, dpi=300):
+    """Convert images in input_dir to a single PDF file
+
+    output_file may also be a writable binary stream (e.g. io.BytesIO), which lets
+    the PDF be handed to the next stage without going through disk. Very large images
+    are downscaled strip by strip to dpi at their printed size before embedding.
+    """
     # Check if input directory exists
     if not os.path.isdir(input_dir):
         print(f"Error: Input directory '{input_dir}' does not exist.")
@@ -51,8 +59,7 @@ def images_to_pdf(input_dir='./input', output_file='output.pdf', page_size=lette
     
     for page_num, img_path in valid_images:
         try:
-            img = Image.open(img_path)
-            width, height = img.size
+            width, height = image_size(img_path)
             
             # Adjust image size to fit page while maintaining aspect ratio
             page_width, page_height = page_size
@@ -64,8 +71,11 @@ def images_to_pdf(input_dir='./input', output_file='output.pdf', page_size=lette
             x_offset = (page_width - new_width) / 2
             y_offset = (page_height - new_height) / 2
             
-            # Add image to PDF
-            c.drawImage(img_path, x_offset, y_offset, width=new_width, height=new_height)
+            # Add image to PDF, downscaling huge scans strip by strip to the page resolution
+            image = img_path
+            if width * height > TILED_PIXEL_THRESHOLD:
+                image = ImageReader(downscale_to_fit(img_path, int(new_width * dpi / 72), int(new_height * dpi / 72)))
+            c.drawImage(image, x_offset, y_offset, width=new_width, height=new_height)
             
             # Add a new page for the next image (except for the last one)
             if page_num < valid_images[-1][0]:
@@ -76,23 +86,26 @@ def images_to_pdf(input_dir='./input', output_file='output.pdf', page_size=lette
     
     # Save the PDF
     c.save()
-    print(f"PDF created successfully: {output_file}")
+    print(f"PDF created successfully: {output_file if isinstance(output_file, str) else 'in-memory stream'}")
     print(f"Included {len(valid_images)} pages in order: {[page for page, _ in valid_images]}")
     return True
 
-def create_test_images(directory='./input', num_images=5):
-    """Create test images with page numbers for demonstration"""
+def create_test_images(directory='./input', num_images=5, width=800, height=1000, rng=None):
+    """Create test images with page numbers for demonstration
+
+    Pass a seeded np.random.Generator as rng to get the same images on every run.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
     # Create directory if it doesn't exist
     if not os.path.exists(directory):
         os.makedirs(directory)
     
-    # Image dimensions
-    width, height = 800, 1000
-    
     # Create sample images
     for i in range(num_images):
         # Create a blank image with random background color
-        bg_color = tuple(np.random.randint(200, 256, 3))
+        bg_color = tuple(rng.integers(200, 256, 3))
         img = Image.new('RGB', (width, height), color=bg_color)
         draw = ImageDraw.Draw(img)
         
@@ -113,10 +126,10 @@ def create_test_images(directory='./input', num_images=5):
         
         # Add some circles with random colors
         for _ in range(5):
-            x = np.random.randint(100, width-100)
-            y = np.random.randint(100, height-100)
-            r = np.random.randint(20, 50)
-            circle_color = tuple(np.random.randint(0, 200, 3))
+            x = rng.integers(100, width-100)
+            y = rng.integers(100, height-100)
+            r = rng.integers(20, 50)
+            circle_color = tuple(rng.integers(0, 200, 3))
             draw.ellipse((x-r, y-r, x+r, y+r), fill=circle_color)
         
         # Save the image
@@ -130,6 +143,7 @@ def main():
     parser.add_argument('-o', '--output', default='output.pdf', help='Output PDF filename (default: output.pdf)')
     parser.add_argument('-t', '--test', action='store_true', help='Generate test images before creating PDF')
     parser.add_argument('-n', '--num-test-images', type=int, default=5, help='Number of test images to generate (default: 5)')
+    parser.add_argument('--dpi', type=int, default=300, help='Resolution very large images are downscaled to (default: 300)')
     args = parser.parse_args()
     
     # Create input directory if it doesn't exist
@@ -147,7 +161,7 @@ def main():
         return
     
     # Convert images to PDF
-    images_to_pdf(args.input, args.output)
+    images_to_pdf(args.input, args.output, dpi=args.dpi)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -14,11 +14,10 @@ import sys
 import copy
 
 
-def get_max_page_size(pdf_paths):
-    """Return the (width, height) of the largest page in all PDFs."""
+def max_page_size(readers):
+    """Return the (width, height) of the largest page in already parsed PDFs."""
     max_width, max_height = 0, 0
-    for path in pdf_paths:
-        reader = PdfReader(path)
+    for reader in readers:
         for page in reader.pages:
             width = float(page.mediabox.width)
             height = float(page.mediabox.height)
@@ -27,12 +26,16 @@ def get_max_page_size(pdf_paths):
     return max_width, max_height
 
 
-def merge_pdfs(pdf_paths, output_path):
-    max_width, max_height = get_max_page_size(pdf_paths)
-    writer = PdfWriter()
+def get_max_page_size(pdf_paths):
+    """Return the (width, height) of the largest page in all PDFs."""
+    return max_page_size(PdfReader(path) for path in pdf_paths)
 
-    for path in pdf_paths:
-        reader = PdfReader(path)
+
+def merge_readers(readers):
+    """Merge already parsed PDFs into a new PdfWriter, centering pages on the largest page size."""
+    max_width, max_height = max_page_size(readers)
+    writer = PdfWriter()
+    for reader in readers:
         for page in reader.pages:
             width = float(page.mediabox.width)
             height = float(page.mediabox.height)
@@ -51,6 +54,12 @@ def merge_pdfs(pdf_paths, output_path):
                 page_copy.add_transformation(Transformation().translate(tx=x_offset, ty=y_offset), expand=True)
                 new_page.merge_page(page_copy)
                 writer.add_page(new_page)
+    return writer
+
+
+def merge_pdfs(pdf_paths, output_path):
+    # Parse each input once and reuse it for both the size scan and the merge
+    writer = merge_readers([PdfReader(path) for path in pdf_paths])
 
     with open(output_path, "wb") as f:
         writer.write(f)
@@ -1,6 +1,52 @@
+#!/usr/bin/env python3
+"""
+Document Region Obfuscation Script
+
+Degrades, adds noise to and optionally blurs sensitive regions of scanned documents.
+
+Usage:
+    python noise_docs.py input.jpg -o output.jpg                      # select the region interactively
+    python noise_docs.py input.jpg -o output.jpg --regions boxes.json
+    python noise_docs.py scans/ -o redacted/ --regions boxes.csv --workers 8
+    python noise_docs.py scans/ -o redacted/ --detect text,mrz,face
+    python noise_docs.py scans/ -o overlays/ --detect mrz,face --dry-run  # only draw the proposed regions
+
+Region specs are either JSON or CSV, with boxes given as pixel coordinates x1, y1, x2, y2:
+
+    JSON: [[x1, y1, x2, y2], ...]                         # same boxes for every image
+          {"scan_01.jpg": [[x1, y1, x2, y2], ...], "*": [...]}  # per file, "*" applies to all
+    CSV:  filename,x1,y1,x2,y2                            # empty filename or "*" applies to all
+
+Regions can also be proposed automatically with OpenCV's classical detectors, which run
+offline on CPU: "text" (text blocks), "mrz" (passport machine readable zones) and "face"
+(bundled Haar cascade). Large scans are scanned in overlapping tiles, and very large
+uncompressed TIFFs are edited through a memory map (see tiled_image.py).
+"""
+
+import argparse
+import csv
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import cv2
 import numpy as np
 
+from tiled_image import TIFF_EXTENSIONS, TILED_PIXEL_THRESHOLD, copy_memmap, open_memmap
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+DETECTORS = ('text', 'mrz', 'face')
+OVERLAY_COLOR = (0, 0, 255)
+# Regions are processed in row bands of at most this many values, bounding temporaries
+BAND_ELEMENTS = 1 << 24
+# Side of the output tiles a degraded region is scaled back up in
+WARP_TILE_SIZE = 4096
+
+_face_cascade = None
+_scratch = threading.local()
+
+
 def select_roi(image):
     # Let the user select ROI via GUI
     r = cv2.selectROI("Select Sensitive Area", image, fromCenter=False, showCrosshair=True)
@@ -8,43 +54,468 @@ def select_roi(image):
     x, y, w, h = map(int, r)
     return (x, y, x + w, y + h)
 
+
+def load_regions(spec_path):
+    """Load region specs from a JSON or CSV file.
+
+    Returns a dict mapping an image file name ('*' for every image) to a list of
+    (x1, y1, x2, y2) boxes.
+    """
+    regions = {}
+    if spec_path.lower().endswith('.csv'):
+        with open(spec_path, newline='') as f:
+            for row in csv.DictReader(f):
+                name = (row.get('filename') or '*').strip() or '*'
+                box = tuple(int(float(row[k])) for k in ('x1', 'y1', 'x2', 'y2'))
+                regions.setdefault(name, []).append(box)
+        return regions
+
+    with open(spec_path) as f:
+        spec = json.load(f)
+    if isinstance(spec, list):
+        spec = {'*': spec}
+    for name, boxes in spec.items():
+        regions[name] = [tuple(int(v) for v in box) for box in boxes]
+    return regions
+
+
+def regions_for(regions, image_path):
+    """Return the boxes from a region spec that apply to image_path."""
+    return regions.get('*', []) + regions.get(os.path.basename(image_path), [])
+
+
+def clip_box(box, shape):
+    """Clamp a (x1, y1, x2, y2) box to the image bounds, returning None if it is empty."""
+    height, width = shape[:2]
+    x1, y1, x2, y2 = box
+    x1, x2 = sorted((max(0, min(width, x1)), max(0, min(width, x2))))
+    y1, y2 = sorted((max(0, min(height, y1)), max(0, min(height, y2))))
+    if x2 - x1 < 1 or y2 - y1 < 1:
+        return None
+    return (x1, y1, x2, y2)
+
+
+def _detect_text(gray):
+    """Propose text blocks: strong local gradients joined horizontally into lines and blocks."""
+    grad = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, bw = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    connected = cv2.morphologyEx(bw, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (15, 5)))
+    contours, _ = cv2.findContours(connected, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < 8 or w < 16:
+            continue
+        # Text areas are dense with edges, unlike photos or empty page margins
+        fill_ratio = cv2.countNonZero(bw[y:y + h, x:x + w]) / float(w * h)
+        if fill_ratio > 0.3:
+            boxes.append((x, y, x + w, y + h))
+    return boxes
+
+
+def _detect_mrz(gray):
+    """Propose machine readable zones: wide bands of dark characters on a light background."""
+    rect_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (13, 5))
+    sq_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (21, 21))
+
+    blackhat = cv2.morphologyEx(cv2.GaussianBlur(gray, (3, 3), 0), cv2.MORPH_BLACKHAT, rect_kernel)
+    grad_x = np.absolute(cv2.Sobel(blackhat, cv2.CV_32F, 1, 0, ksize=-1))
+    grad_x = cv2.normalize(grad_x, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    grad_x = cv2.morphologyEx(grad_x, cv2.MORPH_CLOSE, rect_kernel)
+    _, thresh = cv2.threshold(grad_x, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, sq_kernel)
+    thresh = cv2.erode(thresh, None, iterations=4)
+
+    boxes = []
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h > 0 and w / h > 5 and w > 0.4 * gray.shape[1]:
+            boxes.append((x, y, x + w, y + h))
+    return boxes
+
+
+def _detect_faces(gray):
+    """Propose faces using the frontal face Haar cascade bundled with OpenCV."""
+    global _face_cascade
+    if _face_cascade is None:
+        _face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    faces = _face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(40, 40))
+    return [(x, y, x + w, y + h) for x, y, w, h in faces]
+
+
+_DETECTOR_FUNCS = {
+    'text': _detect_text,
+    'mrz': _detect_mrz,
+    'face': _detect_faces,
+}
+
+
+def iter_tiles(shape, tile_size=2048, overlap=256):
+    """Yield (x1, y1, x2, y2) tiles covering an image of the given shape, overlapping by overlap pixels."""
+    height, width = shape[:2]
+    step = max(1, tile_size - overlap)
+    for y in range(0, max(1, height - overlap), step):
+        for x in range(0, max(1, width - overlap), step):
+            yield (x, y, min(width, x + tile_size), min(height, y + tile_size))
+
+
+def _overlaps(box, other):
+    return box[0] <= other[2] and other[0] <= box[2] and box[1] <= other[3] and other[1] <= box[3]
+
+
+def merge_boxes(boxes, padding=0):
+    """Pad boxes and merge the ones that overlap, so regions split across tiles become one.
+
+    Boxes are swept left to right, comparing each only with the boxes still open at its
+    x1, which keeps the merge close to linear for the many small boxes of text pages.
+    A merged box can grow into a box the sweep already closed, so sweeps repeat until
+    one merges nothing.
+    """
+    merged = [[x1 - padding, y1 - padding, x2 + padding, y2 + padding] for x1, y1, x2, y2 in boxes]
+    while True:
+        merged.sort()
+        result = []
+        active = []
+        for box in merged:
+            box = list(box)
+            active = [other for other in active if other[2] >= box[0]]
+            grown = True
+            while grown:
+                grown = False
+                remaining = []
+                for other in active:
+                    if _overlaps(box, other):
+                        box = [min(box[0], other[0]), min(box[1], other[1]),
+                               max(box[2], other[2]), max(box[3], other[3])]
+                        # Emptied boxes are dropped from result below
+                        other.clear()
+                        grown = True
+                    else:
+                        remaining.append(other)
+                active = remaining
+            active.append(box)
+            result.append(box)
+        result = [box for box in result if box]
+        if len(result) == len(merged):
+            return [tuple(box) for box in result]
+        merged = result
+
+
+def detect_sensitive_regions(image, detectors=DETECTORS, tile_size=2048, overlap=256, padding=4):
+    """Propose (x1, y1, x2, y2) boxes for sensitive content in image.
+
+    The image is processed tile by tile, so memory used by the detectors is bounded
+    by tile_size regardless of the scan resolution.
+    """
+    unknown = set(detectors) - set(DETECTORS)
+    if unknown:
+        raise ValueError(f"Unknown detector(s): {', '.join(sorted(unknown))}")
+
+    boxes = []
+    for tx1, ty1, tx2, ty2 in iter_tiles(image.shape, tile_size, overlap):
+        tile = image[ty1:ty2, tx1:tx2]
+        gray = cv2.cvtColor(tile, cv2.COLOR_BGR2GRAY) if tile.ndim == 3 else tile
+        for name in detectors:
+            for x1, y1, x2, y2 in _DETECTOR_FUNCS[name](gray):
+                boxes.append((x1 + tx1, y1 + ty1, x2 + tx1, y2 + ty1))
+
+    return [box for box in (clip_box(box, image.shape) for box in merge_boxes(boxes, padding)) if box]
+
+
+def draw_overlay(image, boxes, color=OVERLAY_COLOR):
+    """Draw boxes on image in place, used to review proposed regions in dry-run mode."""
+    thickness = max(2, min(image.shape[:2]) // 500)
+    for box in boxes:
+        box = clip_box(box, image.shape)
+        if box is not None:
+            cv2.rectangle(image, box[:2], box[2:], color, thickness)
+    return image
+
+
+def _scratch_buffer(size):
+    """Return a float32 buffer of size elements, reused across calls on the same thread."""
+    buf = getattr(_scratch, 'buf', None)
+    if buf is None or buf.size < size:
+        buf = _scratch.buf = np.empty(size, dtype=np.float32)
+    return buf[:size]
+
+
+def _band_rows(roi, minimum=1):
+    """Return how many rows of roi fit in a band of BAND_ELEMENTS values."""
+    return max(minimum, BAND_ELEMENTS // max(1, roi[0].size))
+
+
+def degrade_resolution(roi, resize_factor):
+    """Downscale a roi by resize_factor and scale it back up, in place.
+
+    The roi is reduced band by band into the small image, which is then enlarged one
+    output tile at a time with an affine warp using the same pixel mapping as
+    cv2.resize, so only the small image and one band or tile are held besides the roi.
+    Tiles also keep each warp within OpenCV's 32767 pixel remap limit.
+    """
+    h, w = roi.shape[:2]
+    small_w, small_h = max(1, int(w * resize_factor)), max(1, int(h * resize_factor))
+    small = np.empty((small_h, small_w) + roi.shape[2:], dtype=roi.dtype)
+    rows = _band_rows(roi)
+    for y in range(0, h, rows):
+        end = min(h, y + rows)
+        top, bottom = round(y * small_h / h), round(end * small_h / h)
+        if bottom > top:
+            small[top:bottom] = cv2.resize(roi[y:end], (small_w, bottom - top),
+                                           interpolation=cv2.INTER_AREA).reshape(small[top:bottom].shape)
+
+    scale_x, scale_y = small_w / w, small_h / h
+    for x1, y1, x2, y2 in iter_tiles(roi.shape, tile_size=WARP_TILE_SIZE, overlap=0):
+        # Output pixel centres map to (x + 0.5) * scale - 0.5 in the small image, as in
+        # cv2.resize; take just the small pixels this tile interpolates between
+        src_x, src_y = (x1 + 0.5) * scale_x - 0.5, (y1 + 0.5) * scale_y - 0.5
+        left, top = max(0, int(np.floor(src_x))), max(0, int(np.floor(src_y)))
+        right = min(small_w, int(np.ceil((x2 - 0.5) * scale_x - 0.5)) + 2)
+        bottom = min(small_h, int(np.ceil((y2 - 0.5) * scale_y - 0.5)) + 2)
+        matrix = np.float32([[scale_x, 0, src_x - left], [0, scale_y, src_y - top]])
+        tile = cv2.warpAffine(small[top:bottom, left:right], matrix, (x2 - x1, y2 - y1),
+                              flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
+        roi[y1:y2, x1:x2] = tile.reshape(roi[y1:y2, x1:x2].shape)
+    return roi
+
+
+def blur_region(roi, kernel_size):
+    """Gaussian blur a roi in place, one row band at a time.
+
+    Each band is blurred together with kernel_size // 2 rows of original context above
+    and below it, so the result matches blurring the whole roi at once.
+    """
+    h = roi.shape[0]
+    margin = kernel_size[1] // 2
+    rows = _band_rows(roi, minimum=max(1, margin))
+    above = roi[:0].copy()
+    for y in range(0, h, rows):
+        end = min(h, y + rows)
+        source = roi[y:min(h, end + margin)]
+        if len(above):
+            source = np.concatenate([above, source])
+        blurred = cv2.GaussianBlur(source, kernel_size, 0).reshape(source.shape)
+        offset = len(above)
+        # Keep the unblurred rows the next band needs as context before overwriting them
+        above = roi[max(0, end - margin):end].copy()
+        roi[y:end] = blurred[offset:offset + end - y]
+    return roi
+
+
+def add_noise(roi, noise_std, rng):
+    """Add Gaussian noise to a uint8 roi in place.
+
+    The noise is drawn as float32 straight into a per-thread scratch buffer, so no
+    full-size temporaries are allocated once the buffer has grown. Large rois are
+    processed in row bands of at most BAND_ELEMENTS values, which caps the buffer.
+    rng must not be shared between threads.
+    """
+    rows = _band_rows(roi)
+    for y in range(0, roi.shape[0], rows):
+        band = roi[y:y + rows]
+        buf = _scratch_buffer(band.size).reshape(band.shape)
+        rng.standard_normal(dtype=np.float32, out=buf)
+        buf *= noise_std
+        np.add(buf, band, out=buf)
+        np.clip(buf, 0, 255, out=buf)
+        np.copyto(band, buf, casting='unsafe')
+    return roi
+
+
+def obfuscate_regions(image, boxes,
+                      resize_factor=0.5,
+                      noise_std=10,
+                      blur_kernel_size=(7, 7),
+                      blur=False,
+                      rng=None):
+    """Degrade every box of image in place and return the number of boxes processed.
+
+    Each box is handled through a view into image, so only the region pixels are
+    touched and the full image is never copied; every step works in row bands so
+    temporaries stay bounded however large the box. rng is a np.random.Generator, pass
+    a seeded one for reproducible noise.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    processed = 0
+    for box in boxes:
+        box = clip_box(box, image.shape)
+        if box is None:
+            continue
+        x1, y1, x2, y2 = box
+        roi = image[y1:y2, x1:x2]
+
+        # Step 1: Resize down and up (quality degradation)
+        if resize_factor != 1:
+            degrade_resolution(roi, resize_factor)
+
+        # Step 2: Add Gaussian noise
+        if noise_std:
+            add_noise(roi, noise_std, rng)
+
+        # Step 3: Apply Gaussian blur
+        if blur:
+            blur_region(roi, blur_kernel_size)
+
+        processed += 1
+    return processed
+
+
+def _map_large_tiff(image_path, output_path):
+    """Return a writable memory map of a copy of image_path at output_path, or None.
+
+    Only used for 8-bit uncompressed TIFFs above TILED_PIXEL_THRESHOLD written to a TIFF.
+    """
+    if not output_path.lower().endswith(TIFF_EXTENSIONS):
+        return None
+    source = open_memmap(image_path)
+    if source is None or source.dtype != np.uint8 or source.shape[0] * source.shape[1] <= TILED_PIXEL_THRESHOLD:
+        return None
+    del source
+    return copy_memmap(image_path, output_path)
+
+
 def degrade_and_blur_region(image_path, output_path,
                             resize_factor=0.5,
                             noise_std=10,
-                            blur_kernel_size=(7, 7)):
-    # Load image
-    image = cv2.imread(image_path)
-    if image is None:
-        raise FileNotFoundError(f"Image not found at {image_path}")
-    
-    # Step 1: Select region interactively
-    x1, y1, x2, y2 = select_roi(image)
-    roi = image[y1:y2, x1:x2]
-
-    # Step 2: Resize down and up (quality degradation)
-    h, w = roi.shape[:2]
-    small = cv2.resize(roi, (int(w * resize_factor), int(h * resize_factor)))
-    degraded = cv2.resize(small, (w, h))
+                            blur_kernel_size=(7, 7),
+                            regions=None,
+                            blur=False,
+                            detect=(),
+                            tile_size=2048,
+                            dry_run=False,
+                            seed=None):
+    """Obfuscate regions of a single image and save the result.
+
+    Regions come from the given boxes plus the ones proposed by the detect detectors.
+    If neither is given the region is selected interactively. With dry_run the proposed
+    regions are only outlined in the output, which is useful to review detections.
+    seed (an int or np.random.SeedSequence) makes the noise reproducible.
 
-    # Step 3: Add Gaussian noise
-    noise = np.random.normal(0, noise_std, degraded.shape).astype(np.float32)
-    noisy = np.clip(degraded.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    Very large uncompressed 8-bit TIFFs written to a TIFF output are copied and edited
+    through a memory map instead of being loaded, so only the tiles visited by the
+    detectors and the region pixels are ever in memory.
+    """
+    image = _map_large_tiff(image_path, output_path)
+    mapped = image is not None
+    if not mapped:
+        # Load image
+        image = cv2.imread(image_path)
+        if image is None:
+            raise FileNotFoundError(f"Image not found at {image_path}")
 
-    # Step 4: Apply Gaussian blur
-    # blurred = cv2.GaussianBlur(noisy, blur_kernel_size, 0)
+    if regions is None and not detect:
+        regions = [select_roi(image)]
+    regions = list(regions or [])
+    if detect:
+        regions += detect_sensitive_regions(image, detect, tile_size=tile_size)
 
-    # Step 5: Replace blurred region in original image
-    result = image.copy()
-    result[y1:y2, x1:x2] = noisy
+    if dry_run:
+        # Memory-mapped TIFFs are RGB rather than OpenCV's BGR
+        draw_overlay(image, regions, OVERLAY_COLOR[::-1] if mapped else OVERLAY_COLOR)
+        count = len(regions)
+    else:
+        count = obfuscate_regions(image, regions, resize_factor=resize_factor, noise_std=noise_std,
+                                  blur_kernel_size=blur_kernel_size, blur=blur,
+                                  rng=np.random.default_rng(seed))
 
     # Save final image
-    cv2.imwrite(output_path, result)
-    print(f"Image saved with obfuscated region to {output_path}")
+    if mapped:
+        image.flush()
+    elif not cv2.imwrite(output_path, image):
+        raise IOError(f"Could not write image to {output_path}")
+    action = "outlined" if dry_run else "obfuscated"
+    print(f"Image saved with {count} {action} region(s) to {output_path}")
+    return count
+
+
+def _process_one(image_path, output_path, boxes, seed, options):
+    # Each worker process already runs in parallel, keep OpenCV single-threaded
+    cv2.setNumThreads(1)
+    return degrade_and_blur_region(image_path, output_path, regions=boxes, seed=seed, **options)
+
+
+def process_directory(input_dir, output_dir, regions, workers=None, seed=None, **options):
+    """Obfuscate every image in input_dir in parallel, writing results to output_dir.
+
+    Returns the number of images processed successfully. regions may be None when
+    options include detectors. Each image gets its own noise stream spawned from seed,
+    so results do not depend on which worker handles which image.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    image_files = sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not image_files:
+        print(f"No image files found in '{input_dir}'.")
+        return 0
+
+    seeds = np.random.SeedSequence(seed).spawn(len(image_files))
+    successful = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_process_one, path, os.path.join(output_dir, os.path.basename(path)),
+                            regions_for(regions, path) if regions is not None else [],
+                            image_seed, options): path
+            for path, image_seed in zip(image_files, seeds)
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+                successful += 1
+            except Exception as e:
+                print(f"Error processing {futures[future]}: {e}")
+
+    print(f"\nSummary: Obfuscated {successful} out of {len(image_files)} images")
+    return successful
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Degrade and add noise to sensitive regions of document images.")
+    parser.add_argument("input", help="Input image or directory of images")
+    parser.add_argument("-o", "--output", required=True, help="Output image, or output directory when input is a directory")
+    parser.add_argument("-r", "--regions", help="JSON or CSV region spec (default: select interactively)")
+    parser.add_argument("-w", "--workers", type=int, help="Parallel worker processes for directories (default: CPU count)")
+    parser.add_argument("--resize-factor", type=float, default=0.5, help="Downscale factor used to degrade regions (default: 0.5)")
+    parser.add_argument("--noise-std", type=float, default=10, help="Standard deviation of the Gaussian noise (default: 10)")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible noise")
+    parser.add_argument("--blur", action="store_true", help="Also apply a Gaussian blur to the regions")
+    parser.add_argument("--blur-kernel", type=int, default=7, help="Gaussian blur kernel size, odd (default: 7)")
+    parser.add_argument("-d", "--detect", help=f"Comma separated detectors proposing regions: {','.join(DETECTORS)}")
+    parser.add_argument("--tile-size", type=int, default=2048, help="Tile size in pixels used by the detectors (default: 2048)")
+    parser.add_argument("--dry-run", action="store_true", help="Only draw the regions on the output instead of obfuscating them")
+    args = parser.parse_args()
+
+    if args.blur_kernel < 1 or args.blur_kernel % 2 == 0:
+        parser.error("--blur-kernel must be a positive odd number")
+
+    detect = tuple(name.strip() for name in args.detect.split(',') if name.strip()) if args.detect else ()
+    unknown = set(detect) - set(DETECTORS)
+    if unknown:
+        parser.error(f"unknown detector(s): {', '.join(sorted(unknown))}")
+
+    options = {
+        'resize_factor': args.resize_factor,
+        'noise_std': args.noise_std,
+        'blur_kernel_size': (args.blur_kernel, args.blur_kernel),
+        'blur': args.blur,
+        'detect': detect,
+        'tile_size': args.tile_size,
+        'dry_run': args.dry_run,
+    }
+    regions = load_regions(args.regions) if args.regions else None
 
-# Example usage
-# degrade_and_blur_region("passport.jpg", "passport_obfuscated.jpg")
+    if os.path.isdir(args.input):
+        if regions is None and not detect:
+            parser.error("--regions or --detect is required when processing a directory")
+        process_directory(args.input, args.output, regions, workers=args.workers, seed=args.seed, **options)
+    else:
+        boxes = regions_for(regions, args.input) if regions is not None else None
+        degrade_and_blur_region(args.input, args.output, regions=boxes, seed=args.seed, **options)
 
-# Example usage:
 
-degrade_and_blur_region("input.jpg", "output.jpg", resize_factor=1, noise_std=10,
-                       blur_kernel_size=(7,7))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Document Pipeline Script
+
+Usage:
+    python pipeline.py scans_a/ scans_b/ cover.pdf -o bundle.pdf
+    python pipeline.py scans_a/ scans_b/ -o bundle.pdf --password secret
+
+Runs images_to_pdf -> merge_pdfs -> protect_pdfs in a single process. Each input is either
+a directory of numbered images (converted like images_to_pdf.py) or an existing PDF. The
+intermediate PDFs stay in memory and are handed between stages as parsed documents, so
+every document is parsed once and only the final (optionally encrypted) PDF is written.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from PyPDF2 import PdfReader
+
+from images_to_pdf import images_to_pdf
+from merge_pdfs import merge_readers
+from protect_pdfs import protect_writer
+
+
+class StageTimer:
+    """Collects wall time per pipeline stage."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self):
+        total = sum(self.timings.values())
+        print("\nStage timings:")
+        for name, seconds in self.timings.items():
+            print(f"  {name:<10} {seconds:8.3f}s")
+        print(f"  {'total':<10} {total:8.3f}s")
+
+
+def load_document(path, timer):
+    """Return a PdfReader for path, rendering image directories to an in-memory PDF first."""
+    if os.path.isdir(path):
+        stream = io.BytesIO()
+        with timer.stage('images'):
+            if not images_to_pdf(path, stream):
+                return None
+        stream.seek(0)
+        with timer.stage('parse'):
+            return PdfReader(stream)
+
+    with timer.stage('parse'):
+        return PdfReader(path)
+
+
+def run_pipeline(inputs, output_path, password=None, skip_errors=False):
+    """Convert, merge and optionally encrypt inputs into output_path.
+
+    Any input that fails to load stops the run before anything is written, unless
+    skip_errors is set, in which case it is left out of the output.
+    Returns a dict of per-stage timings in seconds, or None if the run failed.
+    """
+    timer = StageTimer()
+
+    readers = []
+    for path in inputs:
+        try:
+            reader = load_document(path, timer)
+            if reader is None:
+                raise ValueError("no images could be converted")
+        except Exception as e:
+            print(f"Error loading {path}: {e}")
+            if not skip_errors:
+                print("Error: Not writing a bundle with missing documents (use --skip-errors to leave them out).")
+                return None
+            continue
+        readers.append(reader)
+
+    if not readers:
+        print("Error: No documents to merge.")
+        return None
+
+    with timer.stage('merge'):
+        writer = merge_readers(readers)
+
+    if password:
+        with timer.stage('encrypt'):
+            protect_writer(writer, password)
+
+    with timer.stage('write'):
+        with open(output_path, "wb") as f:
+            writer.write(f)
+
+    print(f"Wrote {len(writer.pages)} pages from {len(readers)} documents to {output_path}"
+          f"{' (password protected)' if password else ''}")
+    timer.report()
+    return timer.timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert image folders and PDFs into a single, optionally password protected, PDF.")
+    parser.add_argument("inputs", nargs='+', help="Image directories and/or PDF files, in output order")
+    parser.add_argument("-o", "--output", default="output.pdf", help="Output PDF file name (default: output.pdf)")
+    parser.add_argument("-p", "--password", help="Password to protect the output PDF with")
+    parser.add_argument("--skip-errors", action="store_true", help="Leave out inputs that fail to load instead of stopping")
+    args = parser.parse_args()
+
+    if run_pipeline(args.inputs, args.output, args.password, args.skip_errors) is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,20 @@ import argparse
 from pathlib import Path
 from PyPDF2 import PdfReader, PdfWriter
 
+def protect_writer(writer, password):
+    """
+    Encrypt a PdfWriter in place with the given password.
+    
+    Args:
+        writer (PdfWriter): Writer holding the pages to protect
+        password (str): Password to encrypt the PDF with
+    
+    Returns:
+        PdfWriter: The same writer, for chaining
+    """
+    writer.encrypt(password)
+    return writer
+
 def protect_pdf(input_path, output_path, password):
     """
     Apply password protection to a PDF file.
@@ -35,7 +49,7 @@ def protect_pdf(input_path, output_path, password):
             writer.add_page(page)
         
         # Encrypt the PDF with the provided password
-        writer.encrypt(password)
+        protect_writer(writer, password)
         
         # Write the protected PDF to the output file
         with open(output_path, "wb") as output_file:
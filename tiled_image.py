@@ -0,0 +1,177 @@
+"""
+Tiled Image Helpers
+
+Memory-bounded access to very large scans, shared by images_to_pdf.py and noise_docs.py.
+
+Uncompressed TIFFs are memory-mapped, so only the pages of the file that are touched get
+loaded. Compressed or tiled TIFFs are read strip by strip through tifffile's zarr store,
+which decodes only the TIFF tiles/strips overlapping the requested rows. Other formats
+fall back to Pillow, using JPEG draft mode to decode at a reduced scale when downscaling.
+
+Tiled TIFF access requires `pip install tifffile zarr`; without it every image is read
+through Pillow.
+"""
+
+import math
+import os
+import shutil
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+# Images above this many pixels take the tiled path
+TILED_PIXEL_THRESHOLD = 64_000_000
+
+# Target number of source pixels read per strip
+STRIP_PIXELS = 16_000_000
+
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+
+
+@contextmanager
+def _no_pixel_limit():
+    """Allow opening huge images, which Pillow refuses as possible decompression bombs."""
+    limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        yield
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+
+
+def image_size(path):
+    """Return (width, height) of an image without decoding its pixels."""
+    with _no_pixel_limit(), Image.open(path) as img:
+        return img.size
+
+
+def open_memmap(path, mode='r'):
+    """Memory-map an uncompressed TIFF as a (height, width[, channels]) array.
+
+    Returns None if tifffile is not installed or the file cannot be mapped, e.g.
+    because it is compressed or not a TIFF.
+    """
+    if not path.lower().endswith(TIFF_EXTENSIONS):
+        return None
+    try:
+        import tifffile
+    except ImportError:
+        return None
+    try:
+        return tifffile.memmap(path, mode=mode)
+    except (ValueError, OSError):
+        return None
+
+
+def _open_zarr(path):
+    """Open a TIFF as a lazily decoded zarr array, or return None."""
+    if not path.lower().endswith(TIFF_EXTENSIONS):
+        return None
+    try:
+        import tifffile
+        import zarr
+    except ImportError:
+        return None
+    store = tifffile.imread(path, aszarr=True)
+    array = zarr.open(store, mode='r')
+    # Pyramidal TIFFs open as a group, level 0 is the full resolution image
+    return array[0] if hasattr(array, 'array_keys') else array
+
+
+def _is_miniswhite(path):
+    """Return True if the first page of a TIFF stores grayscale with 0 as white."""
+    import tifffile
+
+    with tifffile.TiffFile(path) as tif:
+        return tif.pages[0].photometric == tifffile.PHOTOMETRIC.MINISWHITE
+
+
+def _to_rgb8(strip, miniswhite=False):
+    """Convert a strip to 8-bit RGB: expand grayscale and bilevel, drop alpha, scale 16-bit down.
+
+    miniswhite inverts the values, for TIFFs whose photometric interpretation stores
+    0 as white, so they do not come out as negatives.
+    """
+    if strip.dtype == np.bool_:
+        # Bilevel (e.g. CCITT G4) pages decode as booleans, True is the set bit
+        strip = strip.astype(np.uint8) * np.uint8(255)
+    elif strip.dtype == np.uint16:
+        strip = (strip >> 8).astype(np.uint8)
+    elif strip.dtype != np.uint8:
+        strip = np.clip(strip, 0, 255).astype(np.uint8)
+    if miniswhite:
+        strip = np.invert(strip)
+    if strip.ndim == 2:
+        strip = np.repeat(strip[:, :, None], 3, axis=2)
+    return strip[:, :, :3]
+
+
+def read_strips(path, rows):
+    """Yield (y, strip) pairs of at most rows full-width 8-bit RGB rows, top to bottom.
+
+    Memory used is proportional to rows * width for memory-mappable and tiled TIFFs;
+    other formats are decoded once in full by Pillow.
+    """
+    array = open_memmap(path)
+    if array is None:
+        array = _open_zarr(path)
+    if array is not None:
+        # tifffile returns the stored values, Pillow applies the photometric itself
+        miniswhite = _is_miniswhite(path)
+        for y in range(0, array.shape[0], rows):
+            yield y, _to_rgb8(np.asarray(array[y:y + rows]), miniswhite)
+        return
+
+    with _no_pixel_limit(), Image.open(path) as img:
+        img = img.convert('RGB')
+        for y in range(0, img.height, rows):
+            yield y, np.asarray(img.crop((0, y, img.width, min(img.height, y + rows))))
+
+
+def downscale_to_fit(path, max_width, max_height):
+    """Return a PIL RGB image of path box-downscaled to fit within max_width x max_height.
+
+    The image is reduced by an integer factor one strip at a time, so peak memory is
+    bounded by the strip size and the (small) output rather than the source image.
+    """
+    width, height = image_size(path)
+    factor = max(1, math.ceil(max(width / max_width, height / max_height)))
+    if factor == 1:
+        with _no_pixel_limit(), Image.open(path) as img:
+            return img.convert('RGB')
+
+    if not path.lower().endswith(TIFF_EXTENSIONS):
+        with _no_pixel_limit(), Image.open(path) as img:
+            # JPEG can decode directly at 1/2, 1/4 or 1/8 scale, other formats ignore this
+            img.draft('RGB', (math.ceil(width / factor), math.ceil(height / factor)))
+            if img.size != (width, height):
+                img = img.convert('RGB')
+                img.thumbnail((max_width, max_height), Image.LANCZOS)
+                return img
+
+    out_width, out_height = width // factor, height // factor
+    result = np.empty((out_height, out_width, 3), dtype=np.uint8)
+    # Strips are a whole number of blocks tall so blocks never straddle two strips
+    rows = factor * max(1, STRIP_PIXELS // (width * factor))
+    for y, strip in read_strips(path, rows):
+        out_rows = min(strip.shape[0] // factor, out_height - y // factor)
+        if out_rows <= 0:
+            continue
+        blocks = strip[:out_rows * factor, :out_width * factor]
+        blocks = blocks.reshape(out_rows, factor, out_width, factor, 3)
+        result[y // factor:y // factor + out_rows] = blocks.mean(axis=(1, 3), dtype=np.float32) + 0.5
+    return Image.fromarray(result)
+
+
+def copy_memmap(src, dst):
+    """Copy src to dst and memory-map the copy for in-place editing.
+
+    Returns the writable map, or None (without copying) if src is not a memory-mappable
+    TIFF. The copy is streamed, so neither file is ever fully loaded.
+    """
+    if open_memmap(src) is None:
+        return None
+    if os.path.abspath(src) != os.path.abspath(dst):
+        shutil.copyfile(src, dst)
+    return open_memmap(dst, mode='r+')
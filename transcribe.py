@@ -2,10 +2,12 @@ from contextlib import contextmanager
 import os
 import sys
 import logging
-import stable_whisper
 from typing import Optional
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from inference import get_backend  # noqa: E402
+
 # $0.006 per minute / $0.36 per hour (https://openai.com/api/pricing/#:~:text=%240.016%20/%20image-,Audio%20models,-Whisper%20can%20transcribe)
 
 load_dotenv()
@@ -22,23 +24,23 @@ def suppress_stdout():
             sys.stdout = old_stdout
 
 
-def transcribe_audio(audio_file: str, model_size: str = None) -> Optional[str]:
+def transcribe_audio(audio_file: str, model_size: str = None, backend: str = None) -> Optional[str]:
     """
     Transcribe audio file using cached Whisper model
     
     Args:
         audio_file: Path to audio file
         model_size: Whisper model size to use (defaults to env variable or "large-v3")
+        backend: Inference backend, "stable-whisper" or "ctranslate2" (defaults to env variable or "stable-whisper")
     
     Returns:
         Transcribed text or None if error occurs
     """
-    model_size = model_size or os.getenv('WHISPER_MODEL_SIZE', 'large-v3')
     try:
         with suppress_stdout():
-            model = stable_whisper.load_model(model_size)
-            result = model.transcribe(audio_file)
-            return result.text
+            # The backend instance is shared, so the model is loaded once per run
+            result = get_backend(backend, model_size).transcribe(audio_file, language=None)
+            return result['text']
     except Exception as e:
         logging.error(f"Transcription error: {str(e)}")
         return None
@@ -46,8 +48,11 @@ def transcribe_audio(audio_file: str, model_size: str = None) -> Optional[str]:
 def save_transcription(audio_path: str, transcription: str) -> None:
     """Save transcription to a text file with the same name as the audio file"""
     output_path = os.path.splitext(audio_path)[0] + '.txt'
-    with open(output_path, 'w', encoding='utf-8') as f:
+    # Write to a temporary file first so readers never see a partial transcription
+    tmp_path = os.path.join(os.path.dirname(output_path), '.' + os.path.basename(output_path) + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         f.write(transcription)
+    os.replace(tmp_path, output_path)
     logging.info(f"Transcription saved to {output_path}")
 
 def process_file(audio_file: str) -> Optional[str]:
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Watch-folder Ingestion Daemon
+
+Usage:
+    python watch_daemon.py                                   # watch to_transcribe/
+    python watch_daemon.py to_transcribe/ videos/ --workers 4 --status-port 8765
+    python watch_daemon.py videos/ --level 4 --status-file /tmp/watch_status.json
+
+Watches directories with inotify and processes new files once they are fully written:
+.m4a files are transcribed to <name>.txt and .mp4 files are compressed to
+<name>_compressed.mp4. Files are dispatched to a bounded worker pool, the Whisper model is
+loaded once and kept warm, and outputs are written to a temporary name and renamed into
+place. Backlog and throughput are written to a JSON status file and, optionally, served
+over HTTP. Files already present at startup without an output are processed once.
+
+Requires `pip install inotify_simple` (Linux only) and, for .mp4 files, ffmpeg.
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from compress_mp4 import CRF_LEVELS, compress
+from transcribe import save_transcription, transcribe_audio
+
+TRANSCRIBE_EXTENSIONS = ('.m4a',)
+COMPRESS_EXTENSIONS = ('.mp4',)
+COMPRESSED_SUFFIX = '_compressed'
+
+
+def output_path(path: Path) -> Path:
+    """Return the file a finished job for path produces."""
+    if path.suffix.lower() in TRANSCRIBE_EXTENSIONS:
+        return path.with_suffix('.txt')
+    return path.with_name(path.stem + COMPRESSED_SUFFIX + '.mp4')
+
+
+def is_candidate(path: Path) -> bool:
+    """Return True for input files, skipping hidden/temporary files and our own outputs."""
+    if path.name.startswith('.'):
+        return False
+    suffix = path.suffix.lower()
+    if suffix in COMPRESS_EXTENSIONS:
+        return not path.stem.endswith(COMPRESSED_SUFFIX)
+    return suffix in TRANSCRIBE_EXTENSIONS
+
+
+class Status:
+    """Backlog and throughput counters shared by the dispatcher and workers."""
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self.started = time.time()
+        self.queued = set()
+        self.in_progress = {}
+        self.processed = 0
+        self.failed = 0
+        self.recent = deque(maxlen=50)
+        # Finish times of successful jobs in the last hour, for throughput
+        self.completions = deque()
+        # Running files that were written again, to be processed once more when done
+        self.dirty = set()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def enqueued(self, path: Path) -> bool:
+        """Record path as queued, returning False if it is already queued or running.
+
+        A running path is marked dirty instead, so its worker processes it again.
+        """
+        with self._lock:
+            if str(path) in self.in_progress:
+                self.dirty.add(str(path))
+                return False
+            if str(path) in self.queued:
+                return False
+            self.queued.add(str(path))
+        self.write()
+        return True
+
+    def begin(self, path: Path):
+        with self._lock:
+            self.queued.discard(str(path))
+            self.in_progress[str(path)] = time.time()
+        self.write()
+
+    def end(self, path: Path, ok: bool, error: str | None = None) -> bool:
+        """Record a finished job, returning True if path was written again meanwhile."""
+        now = time.time()
+        with self._lock:
+            rerun = str(path) in self.dirty
+            self.dirty.discard(str(path))
+            started = self.in_progress.pop(str(path), now)
+            if ok:
+                self.processed += 1
+                self.completions.append(now)
+            else:
+                self.failed += 1
+            self.recent.append({'file': str(path), 'ok': ok, 'seconds': round(now - started, 3),
+                                'finished': now, 'error': error})
+        self.write()
+        return rerun
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        with self._lock:
+            while self.completions and now - self.completions[0] >= 3600:
+                self.completions.popleft()
+            return {
+                'started': self.started,
+                'uptime_s': round(now - self.started, 1),
+                'backlog': len(self.queued),
+                'in_progress': sorted(self.in_progress),
+                'processed': self.processed,
+                'failed': self.failed,
+                'throughput_per_hour': len(self.completions) * 3600 / min(3600, max(1.0, now - self.started)),
+                'recent': list(self.recent),
+            }
+
+    def write(self):
+        if self.path is None:
+            return
+        # Rename into place so readers never see a half-written status file; workers and
+        # the dispatcher share the temporary name, so only one may write at a time
+        tmp_path = self.path.with_name('.' + self.path.name + '.tmp')
+        try:
+            with self._write_lock:
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.snapshot(), f, indent=2)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            # A status file that cannot be written must not stop a worker
+            logging.error(f"Error writing status file {self.path}: {e}")
+
+
+def process(path: Path, level: int, transcribe_lock: threading.Lock):
+    """Transcribe or compress one file, writing its output atomically."""
+    if path.suffix.lower() in TRANSCRIBE_EXTENSIONS:
+        # A single warm model is shared, so transcriptions run one at a time
+        with transcribe_lock:
+            transcription = transcribe_audio(str(path))
+        if not transcription:
+            raise RuntimeError("transcription failed")
+        save_transcription(str(path), transcription)
+        return
+
+    dst = output_path(path)
+    tmp_path = dst.with_name('.' + dst.stem + '.partial.mp4')
+    try:
+        compress(path, tmp_path, crf=CRF_LEVELS[level])
+    except SystemExit as e:
+        # compress() exits on ffmpeg failure, which must not stop the daemon
+        raise RuntimeError(f"ffmpeg failed with exit code {e.code}")
+    os.replace(tmp_path, dst)
+
+
+def worker(jobs: queue.Queue, status: Status, level: int, transcribe_lock: threading.Lock):
+    while True:
+        path = jobs.get()
+        try:
+            # Go again if the file was rewritten while it was being processed
+            rerun = True
+            while rerun:
+                try:
+                    status.begin(path)
+                    process(path, level, transcribe_lock)
+                    rerun = status.end(path, ok=True)
+                    logging.info(f"Processed {path} -> {output_path(path)}")
+                except Exception as e:
+                    rerun = status.end(path, ok=False, error=str(e))
+                    logging.error(f"Error processing {path}: {e}")
+        finally:
+            jobs.task_done()
+
+
+def serve_status(status: Status, port: int):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps(status.snapshot(), indent=2).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(f"Serving status on http://127.0.0.1:{port}/")
+
+
+def watch(directories, workers=2, queue_size=100, level=3, status_file=None, status_port=None):
+    try:
+        from inotify_simple import INotify, flags
+    except ImportError:
+        sys.exit("inotify_simple not found. Install it first: pip install inotify_simple")
+
+    status = Status(Path(status_file) if status_file else None)
+    if status_port:
+        serve_status(status, status_port)
+
+    # A bounded queue applies back-pressure instead of buffering an unlimited backlog
+    jobs = queue.Queue(maxsize=queue_size)
+    transcribe_lock = threading.Lock()
+    for _ in range(workers):
+        threading.Thread(target=worker, args=(jobs, status, level, transcribe_lock), daemon=True).start()
+
+    def submit(path: Path):
+        # A file written again while it is still queued or running is only processed once
+        if is_candidate(path) and status.enqueued(path):
+            jobs.put(path)
+
+    inotify = INotify()
+    # CLOSE_WRITE fires once a writer is done with the file, MOVED_TO covers atomic renames
+    watch_flags = flags.CLOSE_WRITE | flags.MOVED_TO
+    watches = {}
+    for directory in directories:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        watches[inotify.add_watch(str(directory), watch_flags)] = directory
+        logging.info(f"Watching {directory}")
+
+    def catch_up():
+        for directory in watches.values():
+            for path in sorted(directory.iterdir()):
+                # Running files have no output yet, but were not necessarily rewritten
+                if (is_candidate(path) and not output_path(path).exists()
+                        and str(path) not in status.in_progress):
+                    submit(path)
+
+    # Catch up once on files that arrived while the daemon was not running
+    catch_up()
+
+    status.write()
+    while True:
+        for event in inotify.read():
+            if event.mask & flags.Q_OVERFLOW:
+                # The kernel dropped events, rescan so no file is left unprocessed
+                logging.warning("inotify queue overflowed, rescanning watched directories")
+                catch_up()
+            elif event.name:
+                submit(watches[event.wd] / event.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe .m4a and compress .mp4 files as they land in watched directories.")
+    parser.add_argument("directories", nargs='*', default=["to_transcribe"], help="Directories to watch (default: to_transcribe)")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="Worker threads (default: 2)")
+    parser.add_argument("-q", "--queue-size", type=int, default=100, help="Maximum queued files before new events wait (default: 100)")
+    parser.add_argument("-l", "--level", type=int, default=3, choices=CRF_LEVELS.keys(), help="compress_mp4 compression level for .mp4 files (default: 3)")
+    parser.add_argument("--status-file", default="watch_status.json", help="JSON status file (default: watch_status.json)")
+    parser.add_argument("--status-port", type=int, help="Also serve the status as JSON on this local port")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    try:
+        watch(args.directories, args.workers, args.queue_size, args.level, args.status_file, args.status_port)
+    except KeyboardInterrupt:
+        logging.info("Stopped")
+
+
+if __name__ == "__main__":
+    main()